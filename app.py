@@ -1,14 +1,21 @@
-import json
 import random
+import time
+from html import escape
 import streamlit as st
 import streamlit.components.v1 as components
+from radix.cache import LRUCache
+from radix.compounds import DISPLAY_MODES, phrase_length
+from radix.diagnostics import PROCESS_DIAGNOSTICS, DiagnosticsLog
+from radix.engine import Query
+from radix.export import FORMATS as EXPORT_FORMATS, CompoundExporter, export_stream
+from radix.formatting import clean_field, decomposition_text, get_etymology_text
+from radix.metrics import METRICS
+from radix.reload import LiveDataset
+from radix.search import describe_query, parse_components
 
 # Set page configuration
 st.set_page_config(layout="wide")
 
-# Global IDC characters
-IDC_CHARS = {'⿰', '⿱', '⿲', '⿳', '⿴', '⿵', '⿶', '⿷', '⿸', '⿹', '⿺', '⿻'}
-
 # Dynamic CSS with font scaling
 def apply_dynamic_css():
     font_scale = st.session_state.get('font_scale', 1.0)
@@ -89,87 +96,133 @@ def apply_dynamic_css():
     """
     st.markdown(css, unsafe_allow_html=True)
 
-# Load component map
-@st.cache_data
-def load_component_map():
-    try:
-        with open("enhanced_component_map_with_etymology.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Clean decompositions by removing '?' and logging warnings
-            for char, entry in data.items():
-                decomposition = entry.get("meta", {}).get("decomposition", "")
-                if '?' in decomposition:
-                    st.session_state.diagnostic_messages.append({
-                        "type": "warning",
-                        "message": f"Invalid component '?' in decomposition for {char}: {decomposition}"
-                    })
-                    entry["meta"]["decomposition"] = ""
-            return data
-    except Exception as e:
-        error_msg = f"Failed to load enhanced_component_map_with_etymology.json: {e}"
-        st.error(error_msg)
-        st.session_state.diagnostic_messages.append({"type": "error", "message": error_msg})
-        return {}
-
-component_map = load_component_map()
+# Starting configurations, one picked at random per session
+PRESET_CONFIGS = [
+    {"selected_comp": "爫", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "Single Character"},
+    {"selected_comp": "心", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "⿱", "output_radical": "No Filter", "display_mode": "2-Character Phrases"},
+    {"selected_comp": "⺌", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "3-Character Phrases"},
+    {"selected_comp": "㐱", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "Single Character"},
+    {"selected_comp": "覀", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "2-Character Phrases"},
+    {"selected_comp": "豕", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "⿰", "output_radical": "No Filter", "display_mode": "3-Character Phrases"}
+]
+
+def warm_engine(engine):
+    """Run the presets most sessions start from and build the text and similarity indexes before an engine is published."""
+    for preset in PRESET_CONFIGS:
+        engine.run(Query(**preset))
+    with METRICS.span("text_search.build"):
+        engine.dataset.text_search.build()
+    with METRICS.span("similarity.build"):
+        engine.dataset.similarity.build()
+
+# Load the component map once per process and reload it in the background when the file changes;
+# every session shares the same read-only dataset and query engine. Clearing the cache stops the poll thread
+@st.cache_resource(on_release=LiveDataset.stop)
+def get_live_dataset():
+    with METRICS.span("dataset.load"):
+        return LiveDataset(warm=warm_engine).start()
+
+# Rendered card HTML shared by every session; keys carry the dataset version, so cards from
+# before a reload are never served and simply age out
+CARD_CACHE_SIZE = 20000
+CARD_CACHE_MB = 32
+
+@st.cache_resource
+def get_card_cache():
+    return LRUCache(CARD_CACHE_SIZE, maxbytes=CARD_CACHE_MB << 20)
+
+# Read once per run, so the whole rerun sees one consistent dataset and engine
+live_dataset = get_live_dataset()
+dataset, engine = live_dataset.current()
+card_cache = get_card_cache()
+component_map = dataset.entries
+component_index = dataset.index
 
 # Utility functions
-def clean_field(field):
-    return field[0] if isinstance(field, list) and field else field or "—"
-
 def get_stroke_count(char):
-    strokes = component_map.get(char, {}).get("meta", {}).get("strokes", None)
-    try:
-        if isinstance(strokes, (int, float)) and strokes > 0:
-            return int(strokes)
-        elif isinstance(strokes, str) and strokes.isdigit():
-            return int(strokes)
-    except (TypeError, ValueError):
-        pass
-    return None
-
-def get_etymology_text(meta):
-    etymology = meta.get("etymology", {})
-    hint = clean_field(etymology.get("hint", "No hint available"))
-    details = clean_field(etymology.get("details", ""))
-    return f"{hint}{'; Details: ' + details if details and details != '—' else ''}"
+    return component_index.get_strokes(char)
 
 def format_decomposition(char):
-    """Format the decomposition to show full structure, ignoring invalid components."""
-    decomposition = component_map.get(char, {}).get("meta", {}).get("decomposition", "")
-    if not decomposition or '?' in decomposition:
-        return "—"
-    if decomposition[0] not in IDC_CHARS:
-        return decomposition
-    return decomposition
-
-def get_all_components(char, max_depth, depth=0, seen=None):
-    if seen is None:
-        seen = set()
-    if char in seen or depth > max_depth or not isinstance(char, str) or len(char) != 1:
-        return set()
-    seen.add(char)
-    components = set()
-    decomposition = component_map.get(char, {}).get("meta", {}).get("decomposition", "")
-    if decomposition:
-        for comp in decomposition:
-            if comp in IDC_CHARS or comp == '?' or not isinstance(comp, str) or len(comp) != 1:
-                continue
-            components.add(comp)
-            components.update(get_all_components(comp, max_depth, depth + 1, seen.copy()))
-    return components
+    return decomposition_text(component_map.get(char, {}).get("meta", {}))
+
+def report_diagnostic(kind, message):
+    """Record a warning or error in this session's log and the process-wide one."""
+    st.session_state.diagnostic_messages.add(kind, message)
+    PROCESS_DIAGNOSTICS.add(kind, message)
+
+# Load diagnostics listed in the debug expander; the rest are only counted
+LOAD_DIAGNOSTICS_SHOWN = 20
+
+def diagnostic_line(kind, message, count=1, last_seen=None):
+    class_name = 'error' if kind == 'error' else 'warning'
+    repeats = f" ×{count}" if count > 1 else ""
+    seen = f" <small>(last {time.strftime('%H:%M:%S', time.localtime(last_seen))})</small>" if last_seen else ""
+    return f"<p class='diagnostic-message {class_name}'>{kind.capitalize()}{repeats}: {message}{seen}</p>"
+
+# Lists longer than this can use short labels to keep the selectbox payload small
+LONG_LIST_THRESHOLD = 1000
+
+def option_labeler(options):
+    """format_func for a character selectbox, backed by the shared label table."""
+    if st.session_state.compact_labels and len(options) > LONG_LIST_THRESHOLD:
+        return dataset.labels.short
+    return dataset.labels.full
+
+def get_multi_query():
+    if st.session_state.search_mode != "Multi-Component":
+        return None
+    return (
+        parse_components(st.session_state.multi_all),
+        parse_components(st.session_state.multi_any),
+        parse_components(st.session_state.multi_none)
+    )
+
+def get_query_result():
+    return engine.run(Query(*(st.session_state[k] for k in Query._fields)))
+
+def get_multi_result(multi_query):
+    result = engine.multi(
+        *multi_query, st.session_state.selected_idc, st.session_state.output_radical, st.session_state.display_mode
+    )
+    st.session_state.selected_idc = result.selected_idc
+    st.session_state.output_radical = result.output_radical
+    return result
+
+def apply_query_result(result, include_input=True, include_output=True):
+    """Write the filter values the query result had to correct back to session state."""
+    selected_comp, _, radical, component_idc, selected_idc, output_radical, _ = result.query
+    if include_input:
+        st.session_state.radical = radical
+        st.session_state.component_idc = component_idc
+        if selected_comp != st.session_state.selected_comp:
+            st.session_state.selected_comp = selected_comp
+            st.session_state.text_input_comp = selected_comp
+            if selected_comp:
+                st.session_state.debug_info += f"; Reset selected_comp to '{selected_comp}' due to filters"
+    if include_output:
+        st.session_state.selected_idc = selected_idc
+        st.session_state.output_radical = output_radical
+
+# Session values the input controls own; a change to any of them needs a full rerun
+INPUT_KEYS = ("selected_comp", "stroke_count", "radical", "component_idc", "search_mode", "multi_all", "multi_any", "multi_none", "phrase_chars", "text_query", "batch_text")
+
+def input_signature():
+    return tuple(st.session_state[k] for k in INPUT_KEYS)
+
+def rerun_app_if_inputs_changed():
+    """Fragment reruns only redraw their own part; input changes need the whole page."""
+    if input_signature() != st.session_state.rendered_inputs:
+        st.rerun()
+
+# Result pagination
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
+
+exporter = CompoundExporter(dataset)
 
 # Session state initialization
 def init_session_state():
-    config_options = [
-        {"selected_comp": "爫", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "Single Character"},
-        {"selected_comp": "心", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "⿱", "output_radical": "No Filter", "display_mode": "2-Character Phrases"},
-        {"selected_comp": "⺌", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "3-Character Phrases"},
-        {"selected_comp": "㐱", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "Single Character"},
-        {"selected_comp": "覀", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "No Filter", "output_radical": "No Filter", "display_mode": "2-Character Phrases"},
-        {"selected_comp": "豕", "stroke_count": 0, "radical": "No Filter", "selected_idc": "No Filter", "component_idc": "⿰", "output_radical": "No Filter", "display_mode": "3-Character Phrases"}
-    ]
-    selected_config = random.choice(config_options)
+    selected_config = random.choice(PRESET_CONFIGS)
     defaults = {
         "selected_comp": selected_config["selected_comp"],
         "stroke_count": selected_config["stroke_count"],
@@ -180,12 +233,22 @@ def init_session_state():
         "output_radical": selected_config["output_radical"],
         "text_input_comp": "",
         "page": 1,
+        "page_size": DEFAULT_PAGE_SIZE,
         "previous_selected_comp": selected_config["selected_comp"],
         "text_input_warning": None,
         "debug_info": "",
         "last_processed_input": "",
-        "diagnostic_messages": [],
-        "font_scale": 1.0
+        "diagnostic_messages": DiagnosticsLog(),
+        "font_scale": 1.0,
+        "search_mode": "Single Component",
+        "multi_all": "",
+        "multi_any": "",
+        "multi_none": "",
+        "phrase_chars": "",
+        "text_query": "",
+        "batch_text": "",
+        "compact_labels": False,
+        "rendered_inputs": None
     }
     for key, value in defaults.items():
         st.session_state.setdefault(key, value)
@@ -202,13 +265,21 @@ def process_text_input(component_map):
             st.session_state.debug_info += "; Input already processed, skipping"
             return
         
-        radicals = {c for c in component_map if component_map.get(c, {}).get("meta", {}).get("radical", "") == c}
-        st.session_state.debug_info += f"; {len(radicals)} radicals in component_map"
+        st.session_state.debug_info += f"; {len(component_index.radical_chars)} radicals in component_map"
 
+        # Longer text goes to the batch lookup as a whole passage
+        if len(text_value) > 1:
+            st.session_state.search_mode = "Batch Lookup"
+            st.session_state.batch_text = text_value
+            st.session_state.text_input_warning = None
+            st.session_state.text_input_comp = st.session_state.selected_comp
+            st.session_state.last_processed_input = text_value
+            st.session_state.debug_info += f"; {len(text_value)} characters sent to batch lookup"
+            return
         if len(text_value) != 1:
             warning_msg = "Please enter exactly one character."
             st.session_state.text_input_warning = warning_msg
-            st.session_state.diagnostic_messages.append({"type": "warning", "message": warning_msg})
+            report_diagnostic("warning", warning_msg)
             st.session_state.debug_info += "; Invalid length"
             st.session_state.text_input_comp = ""
             st.session_state.last_processed_input = text_value
@@ -219,14 +290,10 @@ def process_text_input(component_map):
             st.session_state.selected_comp = text_value
             st.session_state.page = 1
             st.session_state.text_input_warning = None
-            filtered_components = [
-                comp for comp in component_map
-                if isinstance(comp, str) and len(comp) == 1 and
-                (st.session_state.stroke_count == 0 or get_stroke_count(comp) == st.session_state.stroke_count) and
-                (st.session_state.radical == "No Filter" or component_map.get(comp, {}).get("meta", {}).get("radical", "") == st.session_state.radical) and
-                (st.session_state.component_idc == "No Filter" or component_map.get(comp, {}).get("meta", {}).get("decomposition", "").startswith(st.session_state.component_idc))
-            ]
-            if text_value not in filtered_components:
+            matching = component_index.matching(
+                st.session_state.stroke_count, st.session_state.radical, st.session_state.component_idc
+            )
+            if matching is not None and component_index.ids.get(text_value) not in matching:
                 st.session_state.debug_info += f"; '{text_value}' not in filtered components, resetting filters"
                 st.session_state.stroke_count = 0
                 st.session_state.radical = "No Filter"
@@ -236,14 +303,14 @@ def process_text_input(component_map):
         else:
             warning_msg = "Invalid character. Please enter a valid component."
             st.session_state.text_input_warning = warning_msg
-            st.session_state.diagnostic_messages.append({"type": "warning", "message": warning_msg})
+            report_diagnostic("warning", warning_msg)
             st.session_state.debug_info += f"; Invalid component '{text_value}'"
             st.session_state.text_input_comp = ""
             st.session_state.last_processed_input = text_value
     except Exception as e:
         error_msg = f"Error processing input: {str(e)}"
         st.session_state.text_input_warning = error_msg
-        st.session_state.diagnostic_messages.append({"type": "error", "message": error_msg})
+        report_diagnostic("error", error_msg)
         st.session_state.debug_info += f"; Error: {str(e)}"
         st.session_state.text_input_comp = ""
         st.session_state.last_processed_input = text_value
@@ -260,11 +327,12 @@ def on_output_char_select(component_map):
     if selected_char == "Select a character..." or selected_char not in component_map:
         if selected_char != "Select a character...":
             warning_msg = "Invalid character selected."
-            st.session_state.diagnostic_messages.append({"type": "warning", "message": warning_msg})
+            report_diagnostic("warning", warning_msg)
         st.session_state.output_char_select = "Select a character..."
         return
     st.session_state.previous_selected_comp = st.session_state.selected_comp
     st.session_state.selected_comp = selected_char
+    st.session_state.search_mode = "Single Component"
     st.session_state.page = 1
     st.session_state.text_input_warning = None
     st.session_state.text_input_comp = selected_char
@@ -281,6 +349,12 @@ def on_reset_filters():
     st.session_state.text_input_comp = ""
     st.session_state.debug_info = "Filters reset"
 
+def on_page_change(delta):
+    st.session_state.page += delta
+
+def on_page_size_change():
+    st.session_state.page = 1
+
 def is_reset_needed():
     return (
         st.session_state.stroke_count != 0 or
@@ -291,22 +365,26 @@ def is_reset_needed():
     )
 
 # Render controls
-def render_controls(component_map):
-    idc_descriptions = {
-        "No Filter": "No Filter",
-        "⿰": "Left Right",
-        "⿱": "Top Bottom",
-        "⿲": "Left Middle Right",
-        "⿳": "Top Middle Bottom",
-        "⿴": "Surround",
-        "⿵": "Surround Top",
-        "⿶": "Surround Bottom",
-        "⿷": "Surround Left",
-        "⿸": "Top Left Corner",
-        "⿹": "Top Right Corner",
-        "⿺": "Bottom Left Corner",
-        "⿻": "Overlaid"
-    }
+IDC_DESCRIPTIONS = {
+    "No Filter": "No Filter",
+    "⿰": "Left Right",
+    "⿱": "Top Bottom",
+    "⿲": "Left Middle Right",
+    "⿳": "Top Middle Bottom",
+    "⿴": "Surround",
+    "⿵": "Surround Top",
+    "⿶": "Surround Bottom",
+    "⿷": "Surround Left",
+    "⿸": "Top Left Corner",
+    "⿹": "Top Right Corner",
+    "⿺": "Bottom Left Corner",
+    "⿻": "Overlaid"
+}
+
+def idc_label(x):
+    return f"{x} ({IDC_DESCRIPTIONS.get(x, x)})" if x != "No Filter" else x
+
+def render_input_controls(component_map, result):
 
     # Filter row for component input filters
     with st.container():
@@ -315,16 +393,11 @@ def render_controls(component_map):
         col1, col2, col3 = st.columns([0.4, 0.4, 0.4])
 
         with col1:
-            stroke_counts = sorted(set(
-                sc for sc in (
-                    get_stroke_count(comp) for comp in component_map
-                    if isinstance(comp, str) and len(comp) == 1
-                ) if isinstance(sc, int) and sc > 0
-            ))
+            stroke_counts = result.stroke_options
             if stroke_counts:
                 st.selectbox(
                     "Filter by Strokes:",
-                    options=[0] + stroke_counts,
+                    options=[0, *stroke_counts],
                     key="stroke_count",
                     format_func=lambda x: "No Filter" if x == 0 else str(x)
                 )
@@ -338,19 +411,7 @@ def render_controls(component_map):
                 )
 
         with col2:
-            pre_filtered_components = [
-                comp for comp in component_map
-                if isinstance(comp, str) and len(comp) == 1 and
-                (st.session_state.stroke_count == 0 or get_stroke_count(comp) == st.session_state.stroke_count)
-            ]
-            radicals = {"No Filter"} | {
-                component_map.get(c, {}).get("meta", {}).get("radical", "")
-                for c in pre_filtered_components
-                if isinstance(c, str) and len(c) == 1 and component_map.get(c, {}).get("meta", {}).get("radical", "")
-            }
-            radical_options = ["No Filter"] + sorted(radicals - {"No Filter"})
-            if st.session_state.radical not in radical_options:
-                st.session_state.radical = "No Filter"
+            radical_options = result.radical_options
             st.selectbox(
                 "Filter by Radical:",
                 options=radical_options,
@@ -359,28 +420,37 @@ def render_controls(component_map):
             )
 
         with col3:
-            pre_filtered_components = [
-                comp for comp in component_map
-                if isinstance(comp, str) and len(comp) == 1 and
-                (st.session_state.stroke_count == 0 or get_stroke_count(comp) == st.session_state.stroke_count) and
-                (st.session_state.radical == "No Filter" or component_map.get(comp, {}).get("meta", {}).get("radical", "") == st.session_state.radical)
-            ]
-            component_idcs = {"No Filter"} | {
-                component_map.get(c, {}).get("meta", {}).get("decomposition", "")[0]
-                for c in pre_filtered_components
-                if isinstance(c, str) and len(c) == 1 and component_map.get(c, {}).get("meta", {}).get("decomposition", "") and component_map.get(c, {}).get("meta", {}).get("decomposition", "")[0] in IDC_CHARS
-            }
-            component_idc_options = ["No Filter"] + sorted(component_idcs - {"No Filter"})
-            if st.session_state.component_idc not in component_idc_options:
-                st.session_state.component_idc = "No Filter"
+            component_idc_options = result.component_idc_options
             st.selectbox(
                 "Filter by Structure IDC:",
                 options=component_idc_options,
-                format_func=lambda x: f"{x} ({idc_descriptions.get(x, x)})" if x != "No Filter" else x,
+                format_func=idc_label,
                 index=component_idc_options.index(st.session_state.component_idc),
                 key="component_idc"
             )
 
+    # Search mode row for multi-component queries
+    with st.container():
+        st.radio("Search Mode:", ["Single Component", "Multi-Component", "Phrase Search", "Text Search", "Batch Lookup"], key="search_mode", horizontal=True)
+        if st.session_state.search_mode == "Multi-Component":
+            st.caption("Find characters built from several components, e.g. all of 氵木 but none of 口.")
+            col9, col10, col11 = st.columns(3)
+            with col9:
+                st.text_input("Contains all of:", key="multi_all", placeholder="e.g. 氵木")
+            with col10:
+                st.text_input("Contains any of:", key="multi_any", placeholder="e.g. 口日")
+            with col11:
+                st.text_input("Contains none of:", key="multi_none", placeholder="e.g. 口")
+        elif st.session_state.search_mode == "Phrase Search":
+            st.caption("Find compound phrases containing all of the given characters; the Output Type sets the phrase length.")
+            st.text_input("Phrases containing:", key="phrase_chars", placeholder="e.g. 心")
+        elif st.session_state.search_mode == "Text Search":
+            st.caption("Find characters by definition or etymology words, or by pinyin with or without tones (ma, mǎ, ma3). The last word may be a prefix.")
+            st.text_input("Search:", key="text_query", placeholder="e.g. water, shui3")
+        elif st.session_state.search_mode == "Batch Lookup":
+            st.caption("Paste a sentence or a whole document to look up every character in it at once.")
+            st.text_area("Passage:", key="batch_text", height=150, placeholder="e.g. 山上有水，水中有木。")
+
     # Input row for component selection
     with st.container():
         st.markdown("### Select Input Component")
@@ -388,47 +458,23 @@ def render_controls(component_map):
         col4, col5 = st.columns([1.5, 0.2])
 
         with col4:
-            filtered_components = [
-                comp for comp in component_map
-                if isinstance(comp, str) and len(comp) == 1 and
-                (st.session_state.stroke_count == 0 or get_stroke_count(comp) == st.session_state.stroke_count) and
-                (st.session_state.radical == "No Filter" or component_map.get(comp, {}).get("meta", {}).get("radical", "") == st.session_state.radical) and
-                (st.session_state.component_idc == "No Filter" or component_map.get(comp, {}).get("meta", {}).get("decomposition", "").startswith(st.session_state.component_idc))
-            ]
-            # Add components from the selected character's decomposition
-            selected_char_components = get_all_components(st.session_state.selected_comp, max_depth=5) if st.session_state.selected_comp else set()
-            filtered_components.extend([comp for comp in selected_char_components if comp not in filtered_components and comp in component_map])
-            sorted_components = sorted(filtered_components, key=lambda c: get_stroke_count(c) or 0)
-            
+            sorted_components = result.components
             if not sorted_components:
-                st.session_state.selected_comp = ""
-                st.session_state.text_input_comp = ""
                 warning_msg = "No components match the current filters. Please adjust the stroke count, radical, or IDC filters."
-                st.session_state.diagnostic_messages.append({"type": "warning", "message": warning_msg})
+                report_diagnostic("warning", warning_msg)
                 st.warning(warning_msg)
                 return
-            if st.session_state.selected_comp not in sorted_components:
-                st.session_state.selected_comp = sorted_components[0]
-                st.session_state.text_input_comp = sorted_components[0]
-                st.session_state.debug_info += f"; Reset selected_comp to '{sorted_components[0]}' due to filters"
 
             index = sorted_components.index(st.session_state.selected_comp) if st.session_state.selected_comp in sorted_components else 0
-            st.selectbox(
-                "Select a component:",
-                options=sorted_components,
-                index=index,
-                format_func=lambda c: (
-                    c if c == "Select a component..." else
-                    f"{c} (Pinyin: {clean_field(component_map.get(c, {}).get('meta', {}).get('pinyin', '—'))}, "
-                    f"Strokes: {get_stroke_count(c) or 'unknown'}, "
-                    f"Radical: {clean_field(component_map.get(c, {}).get('meta', {}).get('radical', '—'))}, "
-                    f"Decomposition: {format_decomposition(c)}, "
-                    f"Definition: {clean_field(component_map.get(c, {}).get('meta', {}).get('definition', 'No definition available'))}, "
-                    f"Etymology: {get_etymology_text(component_map.get(c, {}).get('meta', {}))})"
-                ),
-                key="selected_comp",
-                on_change=on_selectbox_change
-            )
+            with METRICS.span("labels.components"):
+                st.selectbox(
+                    "Select a component:",
+                    options=sorted_components,
+                    index=index,
+                    format_func=option_labeler(sorted_components),
+                    key="selected_comp",
+                    on_change=on_selectbox_change
+                )
 
         with col5:
             if st.session_state.text_input_warning:
@@ -439,56 +485,53 @@ def render_controls(component_map):
                 key="text_input_comp",
                 on_change=process_text_input,
                 args=(component_map,),
-                placeholder="Enter one Chinese character"
+                placeholder="Enter a character or paste text"
             )
 
-    # JavaScript to handle paste events
+    # JavaScript to handle paste events outside of the inputs: one character selects it, longer text is batch looked up
     components.html("""
         <script>
-            let debounceTimeout = null;
-            document.addEventListener('paste', function(e) {
-                clearTimeout(debounceTimeout);
-                const text = (e.clipboardData || window.clipboardData).getData('text').trim();
-                const input = document.querySelector('input[data-testid="stTextInput"]');
-                if (input) {
-                    input.value = text;
-                    input.dispatchEvent(new Event('input', { bubbles: true }));
-                    input.dispatchEvent(new Event('change', { bubbles: true }));
+            const doc = window.parent.document;
+            if (doc.radixPasteHandler) {
+                doc.removeEventListener('paste', doc.radixPasteHandler);
+            }
+            doc.radixPasteHandler = function(e) {
+                const target = e.target;
+                if (target && (target.tagName === 'INPUT' || target.tagName === 'TEXTAREA' || target.isContentEditable)) {
+                    return;
+                }
+                const text = (e.clipboardData || window.parent.clipboardData).getData('text').trim();
+                const input = doc.querySelector('input[aria-label="Or type:"]');
+                if (!text || !input) {
+                    return;
                 }
-            });
+                e.preventDefault();
+                const setValue = Object.getOwnPropertyDescriptor(window.parent.HTMLInputElement.prototype, 'value').set;
+                setValue.call(input, text);
+                input.dispatchEvent(new Event('input', { bubbles: true }));
+                input.focus();
+                input.blur();
+            };
+            doc.addEventListener('paste', doc.radixPasteHandler);
         </script>
     """, height=0)
 
-    # Output filters and results
+def render_output_filters(result, multi_result=None):
     with st.container():
         st.markdown("### Filter Output Characters")
         st.caption("Customize the output by character structure and display mode.")
         col6, col7, col8 = st.columns([0.33, 0.33, 0.34])
+        options_source = multi_result or result
+        idc_options, output_radical_options = options_source.idc_options, options_source.output_radical_options
         with col6:
-            idcs = {"No Filter"} | {
-                component_map.get(c, {}).get("meta", {}).get("decomposition", "")[0]
-                for c in component_map.get(st.session_state.selected_comp, {}).get("related_characters", [])
-                if isinstance(c, str) and len(c) == 1 and component_map.get(c, {}).get("meta", {}).get("decomposition", "") and component_map.get(c, {}).get("meta", {}).get("decomposition", "")[0] in IDC_CHARS
-            }
-            idc_options = ["No Filter"] + sorted(idcs - {"No Filter"})
-            if st.session_state.selected_idc not in idc_options:
-                st.session_state.selected_idc = "No Filter"
             st.selectbox(
                 "Result IDC:",
                 options=idc_options,
-                format_func=lambda x: f"{x} ({idc_descriptions.get(x, x)})" if x != "No Filter" else x,
+                format_func=idc_label,
                 index=idc_options.index(st.session_state.selected_idc),
                 key="selected_idc"
             )
         with col7:
-            output_radicals = {"No Filter"} | {
-                component_map.get(c, {}).get("meta", {}).get("radical", "")
-                for c in component_map.get(st.session_state.selected_comp, {}).get("related_characters", [])
-                if isinstance(c, str) and len(c) == 1 and component_map.get(c, {}).get("meta", {}).get("radical", "")
-            }
-            output_radical_options = ["No Filter"] + sorted(output_radicals - {"No Filter"})
-            if st.session_state.output_radical not in output_radical_options:
-                st.session_state.output_radical = "No Filter"
             st.selectbox(
                 "Result Radical:",
                 options=output_radical_options,
@@ -496,11 +539,11 @@ def render_controls(component_map):
                 key="output_radical"
             )
         with col8:
-            st.radio("Output Type:", ["Single Character", "2-Character Phrases", "3-Character Phrases", "4-Character Phrases"], key="display_mode")
+            st.radio("Output Type:", DISPLAY_MODES, key="display_mode")
         st.button("Reset Filters", on_click=on_reset_filters, disabled=not is_reset_needed())
 
-# Render character card
-def render_char_card(char, compounds):
+# Character card HTML, cached per dataset version; font size is applied by the CSS, not baked in
+def card_details(char):
     meta = component_map.get(char, {}).get("meta", {})
     fields = {
         "Pinyin": clean_field(meta.get("pinyin", "—")),
@@ -510,116 +553,294 @@ def render_char_card(char, compounds):
         "Definition": clean_field(meta.get("definition", "No definition available")),
         "Etymology": get_etymology_text(meta)
     }
-    details = " ".join(f"<strong>{k}:</strong> {v}" for k, v in fields.items())
-    st.markdown(f"""<div class='char-card'><h3 class='char-title'>{char}</h3><p class='details'>{details}</p>""", unsafe_allow_html=True)
-    if compounds and st.session_state.display_mode != "Single Character":
+    return " ".join(f"<strong>{k}:</strong> {v}" for k, v in fields.items())
+
+def render_char_card(char, display_mode, compounds):
+    html = f"""<div class='char-card'><h3 class='char-title'>{char}</h3><p class='details'>{card_details(char)}</p>"""
+    if compounds:
         compounds_text = " ".join(sorted(compounds))
-        st.markdown(f"""<div class='compounds-section'><p class='compounds-title'>{st.session_state.display_mode} for {char}:</p><p class='compounds-list'>{compounds_text}</p></div>""", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+        html += f"""<div class='compounds-section'><p class='compounds-title'>{display_mode} for {char}:</p><p class='compounds-list'>{compounds_text}</p></div>"""
+    return html + "</div>"
+
+def char_card_html(char, compounds):
+    display_mode = st.session_state.display_mode
+    compounds = frozenset(compounds) if display_mode != "Single Character" else frozenset()
+    return card_cache.get_or_compute(
+        ("card", char, display_mode, compounds, dataset.version),
+        lambda: render_char_card(char, display_mode, compounds)
+    )
 
-# Main function
-def main():
-    if not component_map:
-        error_msg = "No data available. Please check the JSON file."
-        st.error(error_msg)
-        st.session_state.diagnostic_messages.append({"type": "error", "message": error_msg})
+def selected_card_html(char):
+    return card_cache.get_or_compute(
+        ("selected", char, dataset.version),
+        lambda: f"""<div class='selected-card'><h2 class='selected-char'>{char}</h2><p class='details'>{card_details(char)}</p></div>"""
+    )
+
+# Render pagination controls and return the slice of results on the current page
+def render_pagination(total):
+    page_size = st.session_state.page_size
+    page_count = max(1, -(-total // page_size))
+    st.session_state.page = min(max(st.session_state.page, 1), page_count)
+    start = (st.session_state.page - 1) * page_size
+    end = min(start + page_size, total)
+    if total > PAGE_SIZE_OPTIONS[0]:
+        col_prev, col_info, col_next, col_size = st.columns([0.15, 0.4, 0.15, 0.3])
+        with col_prev:
+            st.button("◀ Prev", key="page_prev", on_click=on_page_change, args=(-1,), disabled=st.session_state.page <= 1)
+        with col_info:
+            st.caption(f"Page {st.session_state.page} of {page_count} · showing {start + 1}–{end} of {total}")
+        with col_next:
+            st.button("Next ▶", key="page_next", on_click=on_page_change, args=(1,), disabled=st.session_state.page >= page_count)
+        with col_size:
+            st.selectbox("Results per page:", PAGE_SIZE_OPTIONS, key="page_size", on_change=on_page_size_change)
+    return start, end
+
+# Render structurally similar characters
+def render_similar_panel(char, k=10):
+    st.markdown("<h2 class='results-header'>👀 Looks Similar</h2>", unsafe_allow_html=True)
+    with METRICS.span("similar"):
+        similar = dataset.similarity.similar(char, k=k)
+    if not similar:
+        st.caption("No structurally similar characters found.")
         return
+    rows = "".join(
+        f"<p class='details'><span class='char-title'>{c}</span> "
+        f"{clean_field(component_map.get(c, {}).get('meta', {}).get('pinyin', '—'))} "
+        f"<small>({format_decomposition(c)}, score {score:.2f})</small></p>"
+        for c, score in similar
+    )
+    st.markdown(f"<div class='char-card'>{rows}</div>", unsafe_allow_html=True)
 
-    # Apply dynamic CSS
-    apply_dynamic_css()
-# 🈶 🈯
-    st.markdown("<h1>🈑 Radix</h1>", unsafe_allow_html=True)
-    render_controls(component_map)
+# Render compound phrases found by phrase search
+def render_phrase_search():
+    chars = parse_components(st.session_state.phrase_chars)
+    if not chars:
+        st.info("Enter one or more characters to find the phrases that contain them.")
+        return
+    length = phrase_length(st.session_state.display_mode)
+    phrases = engine.phrases(chars, st.session_state.display_mode)
+    label = st.session_state.display_mode if length else "Phrases"
+    st.markdown(f"<h2 class='results-header'>📜 {label} containing {' + '.join(chars)} — {len(phrases)} result(s)</h2>", unsafe_allow_html=True)
+    if phrases:
+        st.markdown(f"<div class='compounds-section'><p class='compounds-list'>{' '.join(phrases)}</p></div>", unsafe_allow_html=True)
+
+# Render ranked characters found by text search
+def render_text_search():
+    query = st.session_state.text_query.strip()
+    if not query:
+        st.info("Enter English words or pinyin to search definitions, etymology and readings.")
+        return
+    with METRICS.span("text_search"):
+        matches = dataset.text_search.search(query)
+    st.markdown(f"<h2 class='results-header'>🔎 Best matches for {escape(query)} — {len(matches)} result(s)</h2>", unsafe_allow_html=True)
+    if not matches:
+        return
+    options = ["Select a character...", *(c for c, _ in matches)]
+    st.selectbox(
+        "Explore a match as the input component:",
+        options=options,
+        key="output_char_select",
+        on_change=on_output_char_select,
+        args=(component_map,),
+        format_func=option_labeler(options)
+    )
+    st.markdown("".join(char_card_html(c, ()) for c, _ in matches), unsafe_allow_html=True)
+
+# Groups are sent to the browser in blocks of this many, so long passages show up progressively
+GROUP_CHUNK = 100
 
-    if not st.session_state.selected_comp:
-        st.info("Please select or type a component to view results.")
+def render_groups(groups, empty_msg):
+    if not groups:
+        st.caption(empty_msg)
         return
+    items = list(groups.items())
+    for start in range(0, len(items), GROUP_CHUNK):
+        st.markdown(
+            "".join(
+                f"<p class='details'><span class='char-title'>{key}</span> <small>({len(chars)})</small> {' '.join(chars)}</p>"
+                for key, chars in items[start:start + GROUP_CHUNK]
+            ),
+            unsafe_allow_html=True
+        )
 
-    meta = component_map.get(st.session_state.selected_comp, {}).get("meta", {})
-    fields = {
-        "Pinyin": clean_field(meta.get("pinyin", "—")),
-        "Strokes": f"{get_stroke_count(st.session_state.selected_comp)} strokes" if get_stroke_count(st.session_state.selected_comp) is not None else "unknown strokes",
-        "Radical": clean_field(meta.get("radical", "—")),
-        "Decomposition": format_decomposition(st.session_state.selected_comp),
-        "Definition": clean_field(meta.get("definition", "No definition available")),
-        "Etymology": get_etymology_text(meta)
-    }
-    details = " ".join(f"<strong>{k}:</strong> {v}" for k, v in fields.items())
-    st.markdown(f"""<div class='selected-card'><h2 class='selected-char'>{st.session_state.selected_comp}</h2><p class='details'>{details}</p></div>""", unsafe_allow_html=True)
-
-    related = component_map.get(st.session_state.selected_comp, {}).get("related_characters", [])
-    filtered_chars = [
-        c for c in related
-        if isinstance(c, str) and len(c) == 1 and
-        (st.session_state.selected_idc == "No Filter" or component_map.get(c, {}).get("meta", {}).get("decomposition", "").startswith(st.session_state.selected_idc)) and
-        (st.session_state.output_radical == "No Filter" or component_map.get(c, {}).get("meta", {}).get("radical", "") == st.session_state.output_radical)
-    ]
-
-    char_compounds = {
-        c: [] if st.session_state.display_mode == "Single Character" else [
-            comp for comp in component_map.get(c, {}).get("meta", {}).get("compounds", [])
-            if len(comp) == int(st.session_state.display_mode[0])
-        ]
-        for c in filtered_chars
-    }
-    filtered_chars = [c for c in filtered_chars if st.session_state.display_mode == "Single Character" or char_compounds[c]]
+# Render every character of a pasted passage with its shared components and radicals
+def render_batch_lookup():
+    passage = engine.passage(st.session_state.batch_text)
+    if not passage.chars and not passage.unknown:
+        st.info("Paste a passage to look up all of its characters at once.")
+        return
+    st.markdown(f"<h2 class='results-header'>📄 Passage — {len(passage.chars)} distinct character(s), {sum(passage.counts)} occurrence(s)</h2>", unsafe_allow_html=True)
+    if passage.unknown:
+        st.warning(f"Not in the dataset: {' '.join(passage.unknown)}")
+    chars_tab, components_tab, radicals_tab = st.tabs(["Characters", "Shared Components", "Radicals"])
+    with chars_tab:
+        with METRICS.span("batch.table"):
+            metas = [component_map[c].get("meta", {}) for c in passage.chars]
+            st.dataframe(
+                {
+                    "Character": passage.chars,
+                    "Count": passage.counts,
+                    "Pinyin": [clean_field(m.get("pinyin", "—")) for m in metas],
+                    "Strokes": [s or None for s in passage.strokes],
+                    "Radical": passage.radicals,
+                    "Decomposition": [decomposition_text(m) for m in metas],
+                    "Definition": [clean_field(m.get("definition", "—")) for m in metas],
+                },
+                hide_index=True
+            )
+    with components_tab:
+        st.caption("Components found in two or more characters of the passage, most shared first.")
+        render_groups(passage.component_groups, "No component is shared by two characters of the passage.")
+    with radicals_tab:
+        render_groups(passage.radical_groups, "No radical is shared by two characters of the passage.")
+
+# Output filters, the selected card and results, rerun on their own when only output-side widgets change
+@st.fragment
+def output_view():
+    rerun_app_if_inputs_changed()
+    with METRICS.span("fragment.output"):
+        render_output_view()
+
+def render_output_view():
+    multi_query = get_multi_query()
+    result = get_query_result()
+    apply_query_result(result, include_input=False, include_output=multi_query is None)
+    multi_result = get_multi_result(multi_query) if multi_query is not None else None
+    if result.components:
+        render_output_filters(result, multi_result)
+
+    if st.session_state.search_mode == "Phrase Search":
+        render_phrase_search()
+        return
+    if st.session_state.search_mode == "Text Search":
+        render_text_search()
+        return
+    if st.session_state.search_mode == "Batch Lookup":
+        render_batch_lookup()
+        return
+
+    if multi_query is not None:
+        if not any(multi_query):
+            st.info("Enter at least one component to search for.")
+            return
+        results_label = describe_query(*multi_query)
+        filtered_chars = sorted_chars = output_options = multi_result.results
+        char_compounds = multi_result.char_compounds
+    else:
+        if not st.session_state.selected_comp:
+            st.info("Please select or type a component to view results.")
+            return
+
+        results_label = st.session_state.selected_comp
+        with METRICS.span("render.selected_card"):
+            st.markdown(selected_card_html(st.session_state.selected_comp), unsafe_allow_html=True)
+
+        filtered_chars = result.results
+        sorted_chars = result.sorted_results
+        char_compounds = result.char_compounds
+        output_options = result.output_options
 
     if filtered_chars:
-        # Add components from the selected character's decomposition to output options
-        selected_char_components = get_all_components(st.session_state.selected_comp, max_depth=5) if st.session_state.selected_comp else set()
-        output_options = sorted(filtered_chars, key=lambda c: get_stroke_count(c) or 0)
-        output_options.extend([comp for comp in selected_char_components if comp not in output_options and comp in component_map])
-        options = ["Select a character..."] + sorted(output_options, key=lambda c: get_stroke_count(c) or 0)
+        options = ["Select a character...", *output_options]
         if (st.session_state.previous_selected_comp and
                 st.session_state.previous_selected_comp != st.session_state.selected_comp and
                 st.session_state.previous_selected_comp not in output_options and
                 st.session_state.previous_selected_comp in component_map):
             options.insert(1, st.session_state.previous_selected_comp)
-        st.selectbox(
-            "Select a character from the list below:",
-            options=options,
-            key="output_char_select",
-            on_change=on_output_char_select,
-            args=(component_map,),
-            format_func=lambda c: (
-                c if c == "Select a character..." else
-                f"{c} (Pinyin: {clean_field(component_map.get(c, {}).get('meta', {}).get('pinyin', '—'))}, "
-                f"Strokes: {get_stroke_count(c) or 'unknown'}, "
-                f"Radical: {clean_field(component_map.get(c, {}).get('meta', {}).get('radical', '—'))}, "
-                f"Decomposition: {format_decomposition(c)}, "
-                f"Definition: {clean_field(component_map.get(c, {}).get('meta', {}).get('definition', 'No definition available'))}, "
-                f"Etymology: {get_etymology_text(component_map.get(c, {}).get('meta', {}))})"
+        with METRICS.span("labels.output"):
+            st.selectbox(
+                "Select a character from the list below:",
+                options=options,
+                key="output_char_select",
+                on_change=on_output_char_select,
+                args=(component_map,),
+                format_func=option_labeler(options)
             )
+
+    if multi_query is None:
+        results_col, similar_col = st.columns([0.75, 0.25])
+        with similar_col:
+            render_similar_panel(st.session_state.selected_comp)
+    else:
+        results_col = st.container()
+    with results_col:
+        st.markdown(f"<h2 class='results-header'>🧬 Results for {results_label} — {len(filtered_chars)} result(s)</h2>", unsafe_allow_html=True)
+        start, end = render_pagination(len(sorted_chars))
+        # Only the visible page is formatted, and it goes to the browser as one block
+        if sorted_chars:
+            with METRICS.span("render.cards"):
+                st.markdown(
+                    "".join(char_card_html(char, char_compounds.get(char, ())) for char in sorted_chars[start:end]),
+                    unsafe_allow_html=True
+                )
+
+    render_export_panel(filtered_chars, char_compounds)
+
+# Export panel, rerun on its own; files are only generated when a download is clicked
+@st.fragment
+def render_export_panel(filtered_chars, char_compounds):
+    if not filtered_chars or st.session_state.display_mode == "Single Character":
+        return
+    length = phrase_length(st.session_state.display_mode)
+    with st.expander("Export Compounds"):
+        st.caption("Download the displayed compounds with pinyin, definitions and source characters, "
+                   "or list several components to export all of their compounds at once.")
+        fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+        bulk = parse_components(st.text_input("Components to export (optional)", key="export_components"))
+        extension, mime = EXPORT_FORMATS[fmt]
+        if bulk:
+            name = "".join(bulk)
+            make_rows = lambda: exporter.component_rows(bulk, length)
+        else:
+            component = st.session_state.selected_comp if st.session_state.search_mode == "Single Component" else ""
+            name = component or "results"
+            shown = [c for c in filtered_chars if char_compounds.get(c)]
+            make_rows = lambda: exporter.rows(shown, length, component)
+        st.download_button(
+            f"Download {fmt}",
+            data=lambda: export_stream(make_rows(), fmt),
+            file_name=f"compounds-{name}-{length}.{extension}",
+            mime=mime,
+            on_click="ignore",
+            key="export_download"
         )
 
-    st.markdown(f"<h2 class='results-header'>🧬 Results for {st.session_state.selected_comp} — {len(filtered_chars)} result(s)</h2>", unsafe_allow_html=True)
-    for char in sorted(filtered_chars, key=lambda c: get_stroke_count(c) or 0):
-        render_char_card(char, char_compounds.get(char, []))
-
-    if filtered_chars and st.session_state.display_mode != "Single Character":
-        with st.expander("Export Compounds"):
-            st.caption("Copy this text to get pinyin and meanings for the displayed compounds.")
-            export_text = "Give me the hanyu pinyin and meaning of each compound phrase in one line a phrase in a downloadable word file\n\n"
-            export_text += "\n".join(
-                compound
-                for char in filtered_chars
-                for compound in char_compounds.get(char, [])
-            )
-            st.text_area("Export Text", export_text, height=200, key="export_text")
-            components.html(f"""
-                <textarea id="copyTarget" style="opacity:0;position:absolute;left:-9999px;">{export_text}</textarea>
-                <script>
-                const copyText = document.getElementById("copyTarget");
-                copyText.select();
-                document.execCommand("copy");
-                </script>
-            """, height=0)
+# Component filters, search mode and the input component; any change to them reruns the whole page
+@st.fragment
+def input_controls():
+    rerun_app_if_inputs_changed()
+    with METRICS.span("fragment.input"):
+        render_input_controls(component_map, get_query_result())
+
+# Main function
+def main():
+    if not component_map:
+        for msg in dataset.diagnostics:
+            if msg["type"] == "error":
+                st.error(msg["message"])
+        error_msg = "No data available. Please check the JSON file."
+        st.error(error_msg)
+        report_diagnostic("error", error_msg)
+        return
+
+    if live_dataset.last_error:
+        report_diagnostic("warning", f"Kept the loaded data: {live_dataset.last_error}")
+
+    # Apply dynamic CSS
+    apply_dynamic_css()
+# 🈶 🈯
+    st.markdown("<h1>🈑 Radix</h1>", unsafe_allow_html=True)
+    apply_query_result(get_query_result(), include_output=False)
+    st.session_state.rendered_inputs = input_signature()
+    input_controls()
+    output_view()
 
     # Render debug information, font slider, and diagnostics
-    radicals = {c for c in component_map if component_map.get(c, {}).get("meta", {}).get("radical", "") == c}
+    radicals = component_index.radical_chars
     with st.expander("Debug Information (For Developers)", expanded=False):
         st.markdown("<div class='debug-section'>", unsafe_allow_html=True)
         st.slider("Adjust Font Size:", 0.7, 1.3, st.session_state.font_scale, 0.1, key="font_scale")
+        st.checkbox(f"Short labels for lists over {LONG_LIST_THRESHOLD} options", key="compact_labels")
         st.write(f"Total components: {len(component_map)}, Radicals: {len(radicals)}")
         st.write(f"Current text_input_comp: '{st.session_state.text_input_comp}'")
         st.write(f"Current selected_comp: '{st.session_state.selected_comp}'")
@@ -627,12 +848,55 @@ def main():
         st.write(f"Current radical: {st.session_state.radical}")
         st.write(f"Current component_idc: {st.session_state.component_idc}")
         st.write(f"Font scale: {st.session_state.font_scale}")
+        st.write(f"Result cache: {engine.cache.stats()}")
+        st.write(f"Card cache: {card_cache.stats()}")
+        st.write(f"Dataset version: {dataset.version}, loaded at {time.strftime('%H:%M:%S', time.localtime(live_dataset.loaded_at))}, reloads: {live_dataset.reloads}")
+        shard_stats = getattr(component_map, "shard_stats", None)
+        if shard_stats:
+            shards = shard_stats()
+            st.write(f"Shards resident: {', '.join(shards['resident'])} of {shards['shards']} "
+                     f"({shards['resident_bytes'] >> 10} KiB, budget {shards['budget_bytes'] >> 10} KiB); "
+                     f"{shards['loads']} loads, {shards['evictions']} evictions")
+        changes = live_dataset.last_changes
+        if changes:
+            st.write(f"Last reload: {len(changes.added)} added, {len(changes.removed)} removed, {len(changes.changed)} changed ({len(changes.structural)} structurally)")
+        if METRICS.enabled:
+            st.markdown("### Rerun Timings")
+            st.table(METRICS.summary())
+            if METRICS.path:
+                st.caption(f"Exported to {METRICS.path}")
+        else:
+            st.caption("Rerun timings are off; set RADIX_METRICS=1 to record them.")
         st.write(f"Debug log: {st.session_state.debug_info}")
         st.markdown("### Errors and Warnings")
-        for msg in st.session_state.diagnostic_messages:
-            class_name = 'error' if msg['type'] == 'error' else 'warning'
-            st.markdown(f"<p class='diagnostic-message {class_name}'>{msg['type'].capitalize()}: {msg['message']}</p>", unsafe_allow_html=True)
+        load_diagnostics = dataset.diagnostics[:LOAD_DIAGNOSTICS_SHOWN]
+        session_log = st.session_state.diagnostic_messages
+        lines = [diagnostic_line(msg["type"], msg["message"]) for msg in load_diagnostics]
+        if len(dataset.diagnostics) > len(load_diagnostics):
+            lines.append(f"<p class='diagnostic-message warning'>… and {len(dataset.diagnostics) - len(load_diagnostics)} more from loading the data</p>")
+        lines.extend(diagnostic_line(r["type"], r["message"], r["count"], r["last_seen"]) for r in session_log.records())
+        if lines:
+            st.markdown("".join(lines), unsafe_allow_html=True)
+        if session_log.dropped:
+            st.caption(f"{session_log.dropped} older distinct message(s) dropped; only the latest {session_log.maxsize} are kept.")
+        st.markdown("### All Sessions")
+        process_records = PROCESS_DIAGNOSTICS.records()
+        if process_records:
+            st.caption(f"{PROCESS_DIAGNOSTICS.total} message(s) reported by every session of this server process.")
+            st.dataframe(
+                [
+                    {"Type": r["type"], "Message": r["message"], "Count": r["count"],
+                     "First Seen": time.strftime("%H:%M:%S", time.localtime(r["first_seen"])),
+                     "Last Seen": time.strftime("%H:%M:%S", time.localtime(r["last_seen"]))}
+                    for r in process_records
+                ],
+                hide_index=True
+            )
+        else:
+            st.caption("No session has reported warnings or errors.")
         st.markdown("</div>", unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
+    with METRICS.span("rerun"):
+        main()
+    METRICS.maybe_export()
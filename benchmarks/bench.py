@@ -0,0 +1,213 @@
+"""Time the Radix hot paths and save the results as JSON.
+
+Cases, each reported as min / mean / p50 / p95 / p99 / max in milliseconds:
+
+- ``load.*``: parsing the JSON, compiling the snapshot, loading from the snapshot
+- ``filter[...]``: every stroke / radical / IDC filter combination
+- ``closure.cold`` / ``closure.warm``: decomposition closures, first and memoized
+- ``compounds`` / ``phrases``: compound lookup by length, phrase search
+- ``multi`` / ``similar``: multi-component search and the look-alike panel
+- ``text_search.*``: building the definition / pinyin index, and ranked queries
+- ``rerun.*``: a full simulated single-component rerun (query and option labels),
+  uncached and from the result cache
+
+Run against the real map, synthetic maps, or both, and compare with an
+earlier run to spot regressions::
+
+    python -m benchmarks.bench --data enhanced_component_map_with_etymology.json
+    python -m benchmarks.bench --sizes 10k 100k -o bench.json --compare old.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import parse_size, write_dataset
+from radix.dataset import load_dataset, load_json_dataset
+from radix.decomposition import DecompositionGraph
+from radix.engine import Query, QueryEngine
+from radix.formatting import LabelTable, clean_field
+from radix.fulltext import TextSearch
+from radix.index import NO_FILTER
+from radix.snapshot import compile_snapshot
+
+QUANTILES = (0.5, 0.95, 0.99)
+REGRESSION_THRESHOLD = 1.25
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(ordered),
+        "min_ms": round(1000 * ordered[0], 4),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 4),
+        **{f"p{round(q * 100)}_ms": round(1000 * pick(q), 4) for q in QUANTILES},
+        "max_ms": round(1000 * ordered[-1], 4),
+    }
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def sample_chars(dataset, k, rng):
+    """Half the most-used components, half random characters."""
+    chars = dataset.index.chars
+    by_fan_out = sorted(chars, key=lambda c: -len(dataset.related_characters(c)))
+    sample = by_fan_out[:k // 2] + rng.sample(chars, min(len(chars), k - k // 2))
+    return list(dict.fromkeys(sample))
+
+
+def most_common(posting_lists):
+    return max(posting_lists, key=lambda key: len(posting_lists[key]))
+
+
+def bench_dataset(path, samples=200, load_repeat=3, seed=0):
+    rng = random.Random(seed)
+    cases = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "bench.radx")
+        cases["load.json"] = summarize(timed(load_json_dataset, [(path,)] * load_repeat))
+        cases["load.compile_snapshot"] = summarize(timed(compile_snapshot, [(path, target)] * load_repeat))
+    load_dataset(path)  # make sure the snapshot next to the source is current
+    cases["load.snapshot"] = summarize(timed(load_dataset, [(path,)] * load_repeat))
+
+    dataset = load_dataset(path)
+    index = dataset.index
+    chars = sample_chars(dataset, samples, rng)
+
+    strokes = most_common(index.by_strokes)
+    radical = most_common(index.by_radical)
+    idc = most_common(index.by_idc)
+    for s, r, i in itertools.product((0, strokes), (NO_FILTER, radical), (NO_FILTER, idc)):
+        name = f"filter[strokes={s or '-'},radical={'-' if r == NO_FILTER else r},idc={'-' if i == NO_FILTER else i}]"
+        cases[name] = summarize(timed(
+            lambda s, r, i: (index.radical_options(s), index.idc_options(s, r), index.filter_components(s, r, i)),
+            [(s, r, i)] * samples
+        ))
+
+    graph = DecompositionGraph(dataset.entries)
+    cases["closure.cold"] = summarize(timed(graph.components, [(c, 6) for c in chars]))
+    cases["closure.warm"] = summarize(timed(graph.components, [(c, 6) for c in chars]))
+
+    cases["compounds"] = summarize(timed(dataset.compounds.compounds, [(c, n) for c in chars for n in (2, 3, 4)]))
+    cases["phrases"] = summarize(timed(dataset.compounds.phrases_containing, [((c,), 0) for c in chars]))
+    pairs = [(tuple(rng.sample(chars[:max(2, len(chars) // 2)], 2)),) for _ in range(samples)]
+    cases["multi"] = summarize(timed(dataset.search.query, pairs))
+    dataset.similarity.build()  # outside the timings
+    cases["similar"] = summarize(timed(dataset.similarity.similar, [(c,) for c in chars]))
+    cases["text_search.build"] = summarize(timed(lambda: TextSearch(dataset.entries, index).build(), [()] * load_repeat))
+    dataset.text_search.build()
+    readings = [(clean_field(dataset.entries[c].get("meta", {}).get("pinyin", "")),) for c in chars]
+    cases["text_search"] = summarize(timed(dataset.text_search.search, readings))
+
+    engine = QueryEngine(dataset, cache_size=len(chars))
+    labels = LabelTable(dataset.entries, index)
+    queries = [Query(c, display_mode=rng.choice(("Single Character", "2-Character Phrases"))) for c in chars]
+
+    def rerun(query, run):
+        result = run(query)
+        for c in (*result.components, *result.output_options):
+            labels.full(c)
+
+    cases["rerun.uncached"] = summarize(timed(rerun, [(q, engine.compute) for q in queries]))
+    for q in queries:
+        engine.run(q)
+    cases["rerun.cached"] = summarize(timed(rerun, [(q, engine.run) for q in queries]))
+    return {"path": path, "entries": len(dataset), "cases": cases}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print p50 ratios against an earlier report and return the regressed cases."""
+    regressions = []
+    for label, current in report["datasets"].items():
+        previous = baseline.get("datasets", {}).get(label)
+        if not previous:
+            continue
+        for case, stats in current["cases"].items():
+            old = previous["cases"].get(case)
+            if not old or not old["p50_ms"]:
+                continue
+            ratio = stats["p50_ms"] / old["p50_ms"]
+            flag = "  REGRESSION" if ratio > threshold else ""
+            print(f"{label:>16} {case:<48} {old['p50_ms']:>10.3f} -> {stats['p50_ms']:>10.3f} ms  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append((label, case, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Radix load, filter, closure, compound and rerun paths.")
+    parser.add_argument("--data", nargs="*", default=[], help="component map JSON files to benchmark")
+    parser.add_argument("--sizes", nargs="*", default=[], help="synthetic map sizes to generate, e.g. 10k 100k 500k")
+    parser.add_argument("--samples", type=int, default=200, help="characters / queries per case")
+    parser.add_argument("--load-repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench-results.json")
+    parser.add_argument("--compare", metavar="REPORT", help="earlier results to compare p50 timings with")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="p50 ratio reported as a regression")
+    args = parser.parse_args(argv)
+    if not args.data and not args.sizes:
+        parser.error("give --data and/or --sizes")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "datasets": {},
+    }
+    for path in args.data:
+        print(f"Benchmarking {path}", file=sys.stderr)
+        report["datasets"][os.path.basename(path)] = bench_dataset(path, args.samples, args.load_repeat, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"synthetic-{size}.json")
+            print(f"Generating {size} entries", file=sys.stderr)
+            stats = write_dataset(path, parse_size(size), seed=args.seed + 1)
+            print(f"Benchmarking synthetic-{size}", file=sys.stderr)
+            result = bench_dataset(path, args.samples, args.load_repeat, args.seed)
+            result["generator"] = stats
+            report["datasets"][f"synthetic-{size}"] = result
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for label, result in report["datasets"].items():
+        print(f"\n{label} ({result['entries']} entries)")
+        for case, stats in result["cases"].items():
+            print(f"  {case:<48} p50 {stats['p50_ms']:>10.3f} ms  p99 {stats['p99_ms']:>10.3f} ms")
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
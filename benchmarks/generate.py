@@ -0,0 +1,187 @@
+"""Synthetic component maps in the shape of enhanced_component_map_with_etymology.json.
+
+Characters are laid out in order: a few hundred primitives (the radicals and
+basic components) first, then composites whose two or three parts are drawn
+from earlier characters with a strong skew towards the common ones. That
+gives the real data's long-tailed ``related_characters`` fan-out (a handful
+of components appear in thousands of characters), decomposition depths of
+up to ``MAX_DEPTH``, stroke counts that grow with depth, and more compounds for
+common characters than for rare ones.
+
+    python -m benchmarks.generate 100k -o /tmp/radix-100k.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+SIZES = {"10k": 10_000, "100k": 100_000, "500k": 500_000}
+PRIMITIVES = 300
+MAX_DEPTH = 7
+RADICALS = 214
+# Real CJK blocks first (URO, Extension A), then supplementary planes
+CODE_POINT_RANGES = ((0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x10FFFF))
+SIDE_BY_SIDE = "⿰⿱"
+THREE_PART = "⿲⿳"
+ENCLOSING = "⿴⿵⿶⿷⿸⿹⿺⿻"
+SYLLABLES = ("ma", "shui", "xin", "lü", "kou", "mu", "ren", "ri", "yue", "shan", "tian", "huo", "jin", "tu", "yu",
+             "zhu", "niao", "chong", "che", "men", "yan", "shou", "zu", "er", "mu", "nü", "zi", "gong", "dao", "li")
+TONES = {"a": "āáǎà", "e": "ēéěè", "i": "īíǐì", "o": "ōóǒò", "u": "ūúǔù", "ü": "ǖǘǚǜ"}
+WORDS = ("water", "wood", "heart", "mouth", "sun", "moon", "mountain", "field", "fire", "metal", "earth", "rain",
+         "bamboo", "bird", "insect", "cart", "gate", "speech", "hand", "foot", "ear", "eye", "woman", "child",
+         "work", "knife", "strength", "stone", "silk", "grain", "jade", "house", "road", "walk", "clothing")
+
+
+def parse_size(value):
+    value = value.lower()
+    if value in SIZES:
+        return SIZES[value]
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def code_points(n):
+    chars = []
+    for lo, hi in CODE_POINT_RANGES:
+        for cp in range(lo, hi + 1):
+            if len(chars) == n:
+                return chars
+            chars.append(chr(cp))
+    if len(chars) < n:
+        raise ValueError(f"cannot generate more than {len(chars)} distinct characters")
+    return chars
+
+
+def pinyin(rng):
+    syllable = rng.choice(SYLLABLES)
+    tone = rng.randrange(5)
+    if tone == 4:
+        return syllable
+    for vowel in "aeoiuü":
+        if vowel in syllable:
+            return syllable.replace(vowel, TONES[vowel][tone], 1)
+    return syllable
+
+
+def skewed(rng, upper, skew):
+    """Index in [0, upper) with low indexes (common components) far more likely."""
+    return int(upper * rng.random() ** skew)
+
+
+def part(rng, i, skew, depths):
+    """A component for character ``i``, redrawn while it would make the tree too deep."""
+    for _ in range(8):
+        p = skewed(rng, i, skew)
+        if depths[p] < MAX_DEPTH:
+            return p
+    return skewed(rng, min(i, PRIMITIVES), 1.0)
+
+
+def build_structure(n, rng, skew=3.0, unknown_rate=0.002):
+    """Decompositions, stroke counts, radicals and depths for ``n`` characters."""
+    chars = code_points(n)
+    primitives = min(PRIMITIVES, n)
+    decompositions, strokes, radicals, depths = [], [], [], []
+    for i, char in enumerate(chars):
+        if i < primitives:
+            decompositions.append("" if i % 5 else char)
+            strokes.append(rng.randint(1, 6))
+            radicals.append(i if i < RADICALS else rng.randrange(RADICALS))
+            depths.append(0)
+            continue
+        roll = rng.random()
+        idc = rng.choice(SIDE_BY_SIDE) if roll < 0.8 else rng.choice(THREE_PART if roll < 0.88 else ENCLOSING)
+        parts = [part(rng, i, skew, depths) for _ in range(3 if idc in THREE_PART else 2)]
+        decomposition = idc + "".join(chars[p] for p in parts)
+        if rng.random() < unknown_rate:
+            decomposition = idc + "?" + chars[parts[-1]]
+        decompositions.append(decomposition)
+        # Deep characters reuse simplified forms, so stroke counts level off around 10-30
+        strokes.append(min(sum(strokes[p] for p in parts), rng.randint(10, 30)))
+        radicals.append(radicals[parts[0]] if rng.random() < 0.7 else radicals[parts[-1]])
+        depths.append(1 + max(depths[p] for p in parts))
+    return chars, decompositions, strokes, radicals, depths
+
+
+def related_characters(chars, decompositions):
+    ids = {c: i for i, c in enumerate(chars)}
+    related = [[] for _ in chars]
+    for i, decomposition in enumerate(decompositions):
+        for component in dict.fromkeys(decomposition):
+            j = ids.get(component)
+            if j is not None and j != i:
+                related[j].append(i)
+    return related
+
+
+def compounds(rng, i, chars, n, skew):
+    """Compound phrases for character ``i``; common characters get more."""
+    mean = 8.0 if i < 3000 else 2.0 if i < 20000 else 0.5
+    count = min(int(rng.expovariate(1 / mean)), 40)
+    phrases = []
+    for _ in range(count):
+        length = rng.choices((2, 3, 4), weights=(60, 25, 15))[0]
+        members = [chars[skewed(rng, min(n, 20000), skew)] for _ in range(length - 1)]
+        members.insert(rng.randrange(length), chars[i])
+        phrases.append("".join(members))
+    return phrases
+
+
+def write_dataset(path, n, seed=1, skew=3.0, unknown_rate=0.002):
+    """Stream a synthetic map of ``n`` entries to ``path`` and return summary statistics."""
+    rng = random.Random(seed)
+    chars, decompositions, strokes, radicals, depths = build_structure(n, rng, skew, unknown_rate)
+    related = related_characters(chars, decompositions)
+    compound_count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i, char in enumerate(chars):
+            phrases = compounds(rng, i, chars, n, skew)
+            compound_count += len(phrases)
+            entry = {
+                "meta": {
+                    "pinyin": [pinyin(rng)],
+                    # The real data has a few stroke counts stored as strings
+                    "strokes": str(strokes[i]) if i % 50 == 7 else strokes[i],
+                    "radical": chars[radicals[i]],
+                    "decomposition": decompositions[i],
+                    "definition": ["; ".join(rng.sample(WORDS, rng.randint(1, 3)))],
+                    "etymology": {
+                        "hint": f"{rng.choice(('Pictographic', 'Ideographic', 'Pictophonetic'))}: {rng.choice(WORDS)}",
+                        "details": f"Combines {' and '.join(decompositions[i][1:]) or char}",
+                    },
+                    "compounds": phrases,
+                },
+                "related_characters": [chars[j] for j in related[i]],
+            }
+            f.write(("," if i else "") + json.dumps(char, ensure_ascii=False) + ":" + json.dumps(entry, ensure_ascii=False))
+        f.write("}")
+    fan_out = sorted(len(r) for r in related)
+    return {
+        "entries": n,
+        "max_depth": max(depths),
+        "mean_depth": round(sum(depths) / n, 2),
+        "max_related": fan_out[-1],
+        "median_related": fan_out[n // 2],
+        "compounds": compound_count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Radix component map.")
+    parser.add_argument("size", help="entry count, e.g. 10k, 100k, 500k or 25000")
+    parser.add_argument("-o", "--output", default="enhanced_component_map_with_etymology.json")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skew", type=float, default=3.0, help="higher values concentrate components on fewer characters")
+    parser.add_argument("--unknown-rate", type=float, default=0.002, help="share of decompositions with a '?' part")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    stats = write_dataset(args.output, parse_size(args.size), args.seed, args.skew, args.unknown_rate)
+    print(f"Wrote {args.output} in {time.perf_counter() - started:.1f}s: {json.dumps(stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
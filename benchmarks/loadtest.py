@@ -0,0 +1,257 @@
+"""Concurrent-session load test for app.py, built on Streamlit's AppTest.
+
+Every simulated session is its own AppTest instance running the real
+script in this process, so all sessions share the process-wide dataset and
+caches exactly like browser sessions on one server. Sessions replay
+interaction scripts (pick a component, type one, change the stroke, radical
+and IDC filters, switch the Output Type, page through results) with their
+own random choices among the options the app currently offers. The run is
+repeated for each session count, and per-interaction p50 / p99 rerun
+latency and the process's peak RSS are reported. No network is involved.
+
+AppTest swaps process-global Streamlit state around every run, so runs of
+different sessions cannot overlap. Sessions are concurrent threads, but
+each rerun takes ``_RUN_LOCK``, much as CPU-bound script threads of one
+server take turns on the GIL. ``latency`` is what a user would wait
+(queueing plus execution) and ``service`` the execution time alone.
+
+    python -m benchmarks.loadtest --sessions 1 10 50 --steps 20
+    python -m benchmarks.loadtest --generate 100k --sessions 1 25 -o loadtest.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench import summarize
+from benchmarks.generate import parse_size, write_dataset
+from radix.compounds import DISPLAY_MODES
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+PLACEHOLDERS = ("No Filter", "Select a character...")
+
+SCRIPTS = {
+    "explore": ("select_component", "display_mode", "output_char", "next_page"),
+    "type": ("type_component", "radical_filter", "idc_filter", "reset_filters"),
+    "filter": ("stroke_filter", "radical_filter", "idc_filter", "result_idc", "result_radical", "display_mode"),
+}
+
+
+def raw_options(widget):
+    """Widget values behind the formatted option labels AppTest exposes."""
+    values = []
+    for label in widget.options:
+        if label in PLACEHOLDERS:
+            values.append(label)
+        elif label.isdigit():
+            values.append(int(label))
+        else:
+            values.append(label[0])
+    return values
+
+
+def _choose(rng, widget, skip_placeholders=False):
+    values = [v for v in raw_options(widget) if v != widget.value and not (skip_placeholders and v in PLACEHOLDERS)]
+    return rng.choice(values) if values else None
+
+
+def _set_selectbox(at, key, rng, skip_placeholders=False):
+    widget = at.selectbox(key=key)
+    value = _choose(rng, widget, skip_placeholders)
+    if value is None:
+        return False
+    widget.set_value(value)
+    return True
+
+
+def _find(elements, **attrs):
+    for element in elements:
+        if all(getattr(element, k, None) == v for k, v in attrs.items()):
+            return element
+    return None
+
+
+def do_select_component(at, rng):
+    return _set_selectbox(at, "selected_comp", rng)
+
+
+def do_type_component(at, rng):
+    value = _choose(rng, at.selectbox(key="selected_comp"))
+    if value is None:
+        return False
+    at.text_input(key="text_input_comp").input(value)
+    return True
+
+
+def do_stroke_filter(at, rng):
+    return _set_selectbox(at, "stroke_count", rng)
+
+
+def do_radical_filter(at, rng):
+    return _set_selectbox(at, "radical", rng)
+
+
+def do_idc_filter(at, rng):
+    return _set_selectbox(at, "component_idc", rng)
+
+
+def do_result_idc(at, rng):
+    return _set_selectbox(at, "selected_idc", rng)
+
+
+def do_result_radical(at, rng):
+    return _set_selectbox(at, "output_radical", rng)
+
+
+def do_output_char(at, rng):
+    return _set_selectbox(at, "output_char_select", rng, skip_placeholders=True)
+
+
+def do_display_mode(at, rng):
+    radio = at.radio(key="display_mode")
+    radio.set_value(rng.choice([m for m in DISPLAY_MODES if m != radio.value]))
+    return True
+
+
+def do_next_page(at, rng):
+    button = _find(at.button, key="page_next", disabled=False)
+    if button is None:
+        return False
+    button.click()
+    return True
+
+
+def do_reset_filters(at, rng):
+    button = _find(at.button, label="Reset Filters", disabled=False)
+    if button is None:
+        return False
+    button.click()
+    return True
+
+
+ACTIONS = {name[3:]: fn for name, fn in globals().items() if name.startswith("do_")}
+
+_RUN_LOCK = threading.Lock()
+
+
+def timed_run(at):
+    """Rerun ``at``; return (latency, service) in seconds."""
+    queued = time.perf_counter()
+    with _RUN_LOCK:
+        started = time.perf_counter()
+        at.run()
+    finished = time.perf_counter()
+    return finished - queued, finished - started
+
+
+def run_session(session_id, script, steps, timeout, think, seed, samples, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    record = {"initial_run": [timed_run(at)]}
+    errors = len(at.exception)
+    skipped = 0
+    for step in range(steps):
+        name = script[step % len(script)]
+        try:
+            if not ACTIONS[name](at, rng):
+                skipped += 1
+                continue
+        except (KeyError, ValueError, IndexError):
+            skipped += 1
+            continue
+        record.setdefault(name, []).append(timed_run(at))
+        errors += len(at.exception)
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+    with lock:
+        for name, values in record.items():
+            samples.setdefault(name, []).extend(values)
+    return errors, skipped
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_level(sessions, steps, timeout, think, seed):
+    samples = {}
+    lock = threading.Lock()
+    names = list(SCRIPTS)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(run_session, i, SCRIPTS[names[i % len(names)]], steps, timeout, think, seed, samples, lock)
+            for i in range(sessions)
+        ]
+        outcomes = [f.result() for f in futures]
+    wall = time.perf_counter() - started
+    reruns = sum(len(v) for v in samples.values())
+    return {
+        "sessions": sessions,
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(reruns / wall, 2),
+        "errors": sum(e for e, _ in outcomes),
+        "skipped": sum(s for _, s in outcomes),
+        "peak_rss_mb": peak_rss_mb(),
+        "interactions": {
+            name: {"latency": summarize([l for l, _ in runs]), "service": summarize([s for _, s in runs])}
+            for name, runs in sorted(samples.items())
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay concurrent sessions against app.py and report rerun latency.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10], help="session counts to run, in order")
+    parser.add_argument("--steps", type=int, default=12, help="interactions per session")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between interactions, seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-rerun AppTest timeout, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--data", help="component map JSON the app should load")
+    group.add_argument("--generate", metavar="SIZE", help="generate a synthetic map of SIZE entries and load that")
+    parser.add_argument("-o", "--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+    # AppTest runs in bare mode, which logs a warning for every thread and widget
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.generate:
+            args.data = os.path.join(tmp, "enhanced_component_map_with_etymology.json")
+            print(f"Generating {args.generate} entries", file=sys.stderr)
+            write_dataset(args.data, parse_size(args.generate), seed=args.seed + 1)
+        if args.data:
+            # Read by radix.dataset when the app first loads its data
+            os.environ["RADIX_DATA_FILE"] = os.path.abspath(args.data)
+
+        levels = []
+        for sessions in args.sessions:
+            print(f"Running {sessions} session(s) x {args.steps} steps", file=sys.stderr)
+            level = run_level(sessions, args.steps, args.timeout, args.think, args.seed)
+            levels.append(level)
+            print(f"\n{sessions} session(s): {level['reruns_per_s']} reruns/s, peak RSS {level['peak_rss_mb']} MB, "
+                  f"{level['errors']} error(s), {level['skipped']} skipped step(s)")
+            for name, stats in level["interactions"].items():
+                latency, service = stats["latency"], stats["service"]
+                print(f"  {name:<18} n={latency['n']:<5} latency p50 {latency['p50_ms']:>9.1f} ms  p99 {latency['p99_ms']:>9.1f} ms"
+                      f"  service p50 {service['p50_ms']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "steps": args.steps, "levels": levels}, f, indent=2)
+        print(f"\nWrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Streamlit-free data structures behind the Radix component explorer."""
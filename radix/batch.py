@@ -0,0 +1,79 @@
+"""Batch lookups of every character in a pasted passage."""
+from collections import Counter, defaultdict, namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from radix.search import is_han
+
+# Smallest number of passage characters a shared component or radical must group
+MIN_GROUP = 2
+
+Passage = namedtuple("Passage", ("chars", "counts", "unknown", "strokes", "radicals", "component_groups", "radical_groups"))
+Passage.__doc__ = """Distinct characters of a passage resolved against the dataset.
+
+``chars`` are the known characters in order of first appearance, with
+``counts``, ``strokes`` (0 when unknown) and ``radicals`` as parallel tuples;
+``unknown`` are Han characters missing from the map. ``component_groups``
+and ``radical_groups`` map a component or radical to the passage characters
+that share it, largest groups first.
+"""
+
+
+class PassageLookup:
+    """Column arrays over a ComponentIndex for resolving many characters at once.
+
+    Stroke counts and radical codes are the index's columns viewed as numpy
+    arrays indexed by character id, so a passage of thousands of distinct
+    characters is one fancy-indexing gather per column, and radical groups
+    come from a single ``np.unique`` over the gathered codes. Component groups invert the
+    memoized decomposition closures of the passage characters.
+    """
+
+    def __init__(self, index, graph):
+        self.index = index
+        self.graph = graph
+        # Views of the index's code columns, not copies
+        self._strokes = np.frombuffer(index.strokes, dtype=np.uint16)
+        self._radical_names = index.radical_names
+        self._radicals = np.frombuffer(index.radical_codes, dtype=np.uint16 if index.radical_codes.itemsize == 2 else np.uint32)
+
+    def lookup(self, text, max_depth=None, min_group=MIN_GROUP):
+        """Resolve the distinct Han characters of ``text``; closures go ``max_depth`` levels down (all when None)."""
+        counts = Counter(c for c in text if is_han(c))
+        ids = self.index.ids
+        known = [c for c in counts if c in ids]
+        unknown = tuple(c for c in counts if c not in ids)
+        char_ids = np.fromiter((ids[c] for c in known), dtype=np.int64, count=len(known))
+
+        strokes = self._strokes[char_ids]
+        radical_codes = self._radicals[char_ids]
+        codes, inverse = np.unique(radical_codes, return_inverse=True)
+        radical_groups = defaultdict(list)
+        for char, group in zip(known, inverse.tolist()):
+            radical_groups[self._radical_names[codes[group]]].append(char)
+
+        component_groups = defaultdict(list)
+        for char in known:
+            for component in self.graph.components(char, max_depth):
+                if component != char:
+                    component_groups[component].append(char)
+
+        return Passage(
+            chars=tuple(known),
+            counts=tuple(counts[c] for c in known),
+            unknown=unknown,
+            strokes=tuple(strokes.tolist()),
+            radicals=tuple(self._radical_names[c] for c in radical_codes.tolist()),
+            component_groups=self._largest_first(component_groups, min_group),
+            radical_groups=self._largest_first(
+                {r: chars for r, chars in radical_groups.items() if r}, min_group
+            ),
+        )
+
+    def _largest_first(self, groups, min_group):
+        position = self.index.position
+        ids = self.index.ids
+        kept = [(key, tuple(chars)) for key, chars in groups.items() if len(chars) >= min_group]
+        kept.sort(key=lambda item: (-len(item[1]), position[ids[item[0]]] if item[0] in ids else len(position)))
+        return MappingProxyType(dict(kept))
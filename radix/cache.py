@@ -0,0 +1,86 @@
+"""Bounded, thread-safe caches shared by every session of a process."""
+import sys
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Mapping with least-recently-used eviction and hit/miss counters.
+
+    Values are shared between sessions and must not be mutated by callers.
+    Nothing here tracks the dataset version: engine caches are replaced
+    together with their dataset, and shared caches put the version in
+    their keys.
+
+    With ``maxbytes`` set, the values' total ``sizeof`` is capped as well
+    as their number.
+    """
+
+    def __init__(self, maxsize, maxbytes=None, sizeof=sys.getsizeof):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self.bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes and len(self._data) > 1):
+                old, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(old)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, self)
+        if value is self:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def items(self):
+        """Snapshot of the entries, least recently used first."""
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,74 @@
+"""Compound-phrase indexes keyed by character and phrase length."""
+from collections import defaultdict
+
+from radix.cache import LRUCache
+
+# Characters whose compounds, split by length, are kept for lookups
+FORWARD_CACHE_SIZE = 8192
+
+DISPLAY_MODES = ["Single Character", "2-Character Phrases", "3-Character Phrases", "4-Character Phrases"]
+
+
+def phrase_length(display_mode):
+    """Phrase length for an Output Type label, 0 for single characters."""
+    return 0 if display_mode == "Single Character" else int(display_mode[0])
+
+
+class CompoundIndex:
+    """Forward and reverse indexes over the ``meta.compounds`` lists.
+
+    ``compounds(char, length)`` returns the compounds listed under a
+    character's entry with the given length, in entry order, read from the
+    entry on first use and kept in an LRU cache. The reverse side maps every
+    compound to the distinct characters it is made of, and each (member
+    character, length) pair to the compounds containing it, so phrase
+    searches never rescan the entries; it needs every entry and is built
+    on the first phrase search. Length 0 stands for any length.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._by_char = LRUCache(FORWARD_CACHE_SIZE)
+        self.members = None
+        self.containing = None
+
+    def _split(self, char):
+        entry = self.entries.get(char)
+        by_length = defaultdict(list)
+        for compound in entry.get("meta", {}).get("compounds", ()) if entry is not None else ():
+            by_length[len(compound)].append(compound)
+        return {length: tuple(compounds) for length, compounds in by_length.items()}
+
+    def compounds(self, char, length):
+        if not length:
+            return ()
+        return self._by_char.get_or_compute(char, lambda: self._split(char)).get(length, ())
+
+    def build(self):
+        """Build the reverse indexes now rather than on the first phrase search."""
+        if self.containing is not None:
+            return
+        containing = defaultdict(set)
+        members = {}
+        for entry in self.entries.values():
+            for compound in entry.get("meta", {}).get("compounds", ()):
+                if compound not in members:
+                    members[compound] = tuple(dict.fromkeys(compound))
+                    for member in members[compound]:
+                        containing[member, len(compound)].add(compound)
+                        containing[member, 0].add(compound)
+        self.members = members
+        self.containing = {key: frozenset(compounds) for key, compounds in containing.items()}
+        # Reading every entry decoded all rare shards of a sharded snapshot; lookups reload the ones they need
+        evict = getattr(self.entries, "evict_shards", None)
+        if evict:
+            evict()
+
+    def phrases_containing(self, chars, length=0):
+        """Sorted compounds of ``length`` (any when 0) containing every one of ``chars``."""
+        self.build()
+        postings = [self.containing.get((c, length), frozenset()) for c in chars]
+        if not postings:
+            return []
+        postings.sort(key=len)
+        return sorted(postings[0].intersection(*postings[1:]))
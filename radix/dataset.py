@@ -0,0 +1,111 @@
+"""Process-wide, read-only component dataset."""
+import hashlib
+import json
+import os
+from types import MappingProxyType
+
+from radix.batch import PassageLookup
+from radix.compounds import CompoundIndex
+from radix.decomposition import DecompositionGraph
+from radix.entries import clean_entries, freeze
+from radix.formatting import LabelTable
+from radix.fulltext import TextSearch
+from radix.index import ComponentIndex
+from radix.related import RelatedIndex
+from radix.search import ComponentSearch
+from radix.similarity import SimilarityIndex
+from radix.snapshot import Snapshot, ensure_snapshot
+
+DATA_FILE = "enhanced_component_map_with_etymology.json"
+
+
+def data_file():
+    """The component map to load: ``RADIX_DATA_FILE`` if set, else ``DATA_FILE``."""
+    return os.environ.get("RADIX_DATA_FILE") or DATA_FILE
+
+
+def stored_related():
+    """Whether ``RADIX_STORED_RELATED`` asks for the hand-maintained related lists over the derived ones."""
+    return os.environ.get("RADIX_STORED_RELATED", "").lower() in ("1", "true", "yes", "on")
+
+
+class Dataset:
+    """Immutable component map shared by every session of a process.
+
+    ``entries`` is a read-only character -> entry mapping, ``diagnostics`` the
+    warnings and errors collected while loading, and ``version`` a short hash
+    of the source file. Derived structures are built alongside:
+
+    - ``index``: posting lists for the component filters
+    - ``graph``: transitive decomposition closures
+    - ``search``: multi-component bitset queries
+    - ``similarity``: structural look-alikes (built on first use)
+    - ``compounds``: compound phrases by character, length and member
+    - ``labels``: memoized selectbox labels
+    - ``text_search``: ranked definition / etymology / pinyin search (built on first use)
+    - ``passages``: batch lookups of pasted text
+    - ``related``: component -> containing characters, from the decompositions (built on first use)
+
+    With ``stored_related`` set, the ``related_characters`` lists of the map
+    are served where an entry has one instead of the derived lists.
+    """
+
+    def __init__(self, entries, diagnostics=(), version="", stored_related=False):
+        self.entries = entries
+        self.diagnostics = tuple(diagnostics)
+        self.version = version
+        self.stored_related = stored_related
+        self.index = ComponentIndex(self.entries)
+        self.graph = DecompositionGraph(self.entries)
+        self.related = RelatedIndex(self.entries, self.graph)
+        self.search = ComponentSearch(self.related_characters, self.index)
+        self.similarity = SimilarityIndex(self.index, self.graph)
+        self.compounds = CompoundIndex(self.entries)
+        self.labels = LabelTable(self.entries, self.index)
+        self.text_search = TextSearch(self.entries, self.index)
+        self.passages = PassageLookup(self.index, self.graph)
+
+    def related_characters(self, char):
+        """Characters listing ``char`` as a direct component, derived from the decompositions."""
+        entry = self.entries.get(char)
+        if entry is None:
+            return ()
+        if self.stored_related:
+            related = entry.get("related_characters")
+            if related is not None:
+                return related
+        return self.related.characters(char)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def load_json_dataset(path):
+    """Parse the whole JSON file into memory (used when no snapshot can be built)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    diagnostics = clean_entries(data)
+    entries = MappingProxyType({char: freeze(entry) for char, entry in data.items()})
+    return Dataset(entries, diagnostics, hashlib.sha256(raw).hexdigest()[:16], stored_related())
+
+
+def load_dataset(path=None):
+    """Map the compiled snapshot of ``path``, rebuilding it when the source changed."""
+    path = path or data_file()
+    diagnostics = []
+    try:
+        snapshot = Snapshot(ensure_snapshot(path))
+        return Dataset(snapshot, snapshot.diagnostics, snapshot.version, stored_related())
+    except OSError as e:
+        if not isinstance(e, FileNotFoundError):
+            diagnostics.append({"type": "warning", "message": f"Snapshot unavailable, loading {path} directly: {e}"})
+    except Exception as e:
+        diagnostics.append({"type": "warning", "message": f"Snapshot unavailable, loading {path} directly: {e}"})
+    try:
+        dataset = load_json_dataset(path)
+    except Exception as e:
+        diagnostics.append({"type": "error", "message": f"Failed to load {path}: {e}"})
+        return Dataset(MappingProxyType({}), diagnostics)
+    dataset.diagnostics = (*diagnostics, *dataset.diagnostics)
+    return dataset
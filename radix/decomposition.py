@@ -0,0 +1,95 @@
+"""Transitive decomposition closures over the component graph."""
+from bisect import bisect_right
+from functools import lru_cache
+
+from radix.index import IDC_CHARS
+
+# Characters whose direct components are kept parsed; shared components are read over and over
+PARTS_CACHE_SIZE = 16384
+
+
+def direct_components(decomposition):
+    """Return the distinct components of a decomposition string, in order."""
+    return tuple(dict.fromkeys(c for c in decomposition if c not in IDC_CHARS and c != '?'))
+
+
+class DecompositionGraph:
+    """Character -> component edges with a memoized, depth-annotated closure.
+
+    The closure of a character lists every component reachable through its
+    decomposition together with the shortest number of levels needed to
+    reach it (1 for direct components). It is computed once per character
+    with an iterative breadth-first walk, so cycles and components shared by
+    several branches are expanded only once, and depth-limited queries are
+    answered by slicing the stored closure. Direct components are read off
+    the entries' decompositions as a walk reaches them and only the most
+    recently used are kept parsed, not one tuple per character.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        # Snapshots read a decomposition off their column without building an entry view
+        self._decomposition = getattr(entries, "decomposition", None) or self._entry_decomposition
+        self._closures = {}
+        self.parts = lru_cache(maxsize=PARTS_CACHE_SIZE)(self._parts)
+
+    def _entry_decomposition(self, char):
+        entry = self.entries.get(char)
+        return entry.get("meta", {}).get("decomposition", "") if entry is not None else ""
+
+    def _parts(self, char):
+        """Direct components of ``char``, in decomposition order (``parts`` is the cached form)."""
+        return direct_components(self._decomposition(char))
+
+    def closure(self, char):
+        """Return ``(components, depths)`` for ``char``, both ordered by depth."""
+        closure = self._closures.get(char)
+        if closure is None:
+            closure = self._closures[char] = self._walk(char)
+        return closure
+
+    def _walk(self, root):
+        components, depths = [], []
+        seen = set()
+        frontier = [root]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for char in frontier:
+                for part in self.parts(char):
+                    if part in seen:
+                        continue
+                    seen.add(part)
+                    components.append(part)
+                    depths.append(depth)
+                    if part != root:
+                        next_frontier.append(part)
+            frontier = next_frontier
+        return tuple(components), tuple(depths)
+
+    def adopt(self, previous, changed):
+        """Reuse the closures memoized by ``previous`` that no character in ``changed`` can alter."""
+        changed = set(changed)
+        for char, closure in previous._closures.items():
+            if char not in changed and changed.isdisjoint(closure[0]):
+                self._closures.setdefault(char, closure)
+
+    def components(self, char, max_depth=None):
+        """Components of ``char`` at most ``max_depth`` levels down (all when None)."""
+        components, depths = self.closure(char)
+        if max_depth is None:
+            return components
+        return components[:bisect_right(depths, max_depth)]
+
+    def depth(self, char, component):
+        """Shortest number of levels from ``char`` down to ``component``, or None."""
+        components, depths = self.closure(char)
+        try:
+            return depths[components.index(component)]
+        except ValueError:
+            return None
+
+    def precompute(self):
+        for char in self.entries:
+            self.closure(char)
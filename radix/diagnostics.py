@@ -0,0 +1,63 @@
+"""Bounded, deduplicated logs of warnings and errors."""
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_LOG_SIZE = 50
+PROCESS_LOG_SIZE = 200
+
+
+class DiagnosticsLog:
+    """The most recent distinct diagnostics, with repeat counts and timestamps.
+
+    A diagnostic is keyed by its type and message: repeating one bumps its
+    count and last-seen time and moves it to the newest end instead of
+    adding an entry, and the oldest is dropped past ``maxsize``. Adding is
+    O(1), so a warning raised on every rerun costs the same on the
+    thousandth rerun as on the first.
+    """
+
+    def __init__(self, maxsize=SESSION_LOG_SIZE):
+        self.maxsize = maxsize
+        self.total = 0
+        self.dropped = 0
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, kind, message):
+        now = time.time()
+        key = (kind, message)
+        with self._lock:
+            self.total += 1
+            record = self._records.get(key)
+            if record is None:
+                self._records[key] = [1, now, now]
+                if len(self._records) > self.maxsize:
+                    self._records.popitem(last=False)
+                    self.dropped += 1
+            else:
+                record[0] += 1
+                record[2] = now
+                self._records.move_to_end(key)
+
+    def records(self):
+        """Newest first, as dicts with type, message, count, first_seen and last_seen."""
+        with self._lock:
+            items = [(kind, message, *record) for (kind, message), record in reversed(self._records.items())]
+        return [
+            {"type": kind, "message": message, "count": count, "first_seen": first, "last_seen": last}
+            for kind, message, count, first, last in items
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self.total = 0
+            self.dropped = 0
+
+    def __len__(self):
+        return len(self._records)
+
+
+# Diagnostics of every session of the process
+PROCESS_DIAGNOSTICS = DiagnosticsLog(PROCESS_LOG_SIZE)
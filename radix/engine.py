@@ -0,0 +1,368 @@
+"""Headless query engine behind the Streamlit view.
+
+Everything a rerun derives from its filter values lives here, without any
+Streamlit import, so it can be profiled, benchmarked and run in batch jobs.
+``app.py`` only maps session state to a ``Query`` and renders the result.
+
+One-off and batch lookups from the command line::
+
+    python -m radix.engine 木
+    python -m radix.engine 木 --mode 2 --result-idc ⿰ --json
+    python -m radix.engine --all 氵木 --none 口
+    python -m radix.engine --text "water shui3"
+    python -m radix.engine --batch queries.txt   # one character or JSON query per line
+"""
+import argparse
+import json
+import sys
+from collections import namedtuple
+from types import MappingProxyType
+
+from radix.cache import LRUCache
+from radix.compounds import DISPLAY_MODES, phrase_length
+from radix.dataset import load_dataset
+from radix.index import NO_FILTER
+from radix.metrics import METRICS
+from radix.search import parse_components
+
+# Closure depth the component and output lists include for the selected character
+COMPONENT_DEPTH = 5
+RESULT_CACHE_SIZE = 512
+PASSAGE_CACHE_SIZE = 32
+
+Query = namedtuple(
+    "Query",
+    ("selected_comp", "stroke_count", "radical", "component_idc", "selected_idc", "output_radical", "display_mode"),
+    defaults=("", 0, NO_FILTER, NO_FILTER, NO_FILTER, NO_FILTER, DISPLAY_MODES[0]),
+)
+Query.__doc__ = "Filter values of a single-component lookup, in the order of the UI widgets."
+
+QueryResult = namedtuple(
+    "QueryResult",
+    ("query", "stroke_options", "radical_options", "component_idc_options", "components",
+     "idc_options", "output_radical_options", "results", "sorted_results", "char_compounds", "output_options"),
+)
+QueryResult.__doc__ = """Everything a single-component view shows for a Query.
+
+``query`` is the Query with stale filters corrected, ``components`` the
+component list, ``results`` the related characters passing the output
+filters (``sorted_results`` in stroke order) and ``output_options`` the
+characters offered to jump to next.
+"""
+
+MultiResult = namedtuple("MultiResult", ("selected_idc", "output_radical", "idc_options", "output_radical_options", "results", "char_compounds"))
+MultiResult.__doc__ = "Characters matching a multi-component query, with the corrected output filters."
+
+
+class QueryEngine:
+    """Pure-Python lookups over a Dataset, with an LRU cache of single-component results.
+
+    Results only hold tuples and read-only mappings, so one engine can serve
+    every session of a process.
+    """
+
+    def __init__(self, dataset, cache_size=RESULT_CACHE_SIZE):
+        self.dataset = dataset
+        self.cache = LRUCache(cache_size)
+        self.passages = LRUCache(PASSAGE_CACHE_SIZE)
+
+    def successor(self, dataset, changes):
+        """Engine for a reloaded ``dataset`` that keeps the cached results ``changes`` leave intact.
+
+        Edits to the cold text fields never reach a QueryResult, so all of
+        them are kept. After structural edits a result is dropped when a
+        changed character is its selected character or in that character's
+        closure, when the selected character's related list changed, when a
+        changed character whose filter attributes (strokes, radical, IDC)
+        differ would pass the component filters before or after the edit, or
+        when a listed result changed its attributes or compounds. Results
+        whose filter options changed are dropped too.
+        """
+        engine = QueryEngine(dataset, self.cache.maxsize)
+        if changes.reordered:
+            return engine
+        affected = set(changes.structural)
+        if not affected:
+            for key, value in self.cache.items():
+                engine.cache.put(key, value)
+            for key, value in self.passages.items():
+                engine.passages.put(key, value)
+            return engine
+        old_index, index = self.dataset.index, dataset.index
+        moved = {}
+        for char in affected:
+            before, after = _attributes(old_index, char), _attributes(index, char)
+            if before != after:
+                moved[char] = (before, after)
+        stroke_options = tuple(index.stroke_options())
+        radical_options = {}
+        idc_options = {}
+        for query, result in self.cache.items():
+            stroke_count, radical = query.stroke_count, query.radical
+            if stroke_count not in radical_options:
+                radical_options[stroke_count] = (NO_FILTER, *index.radical_options(stroke_count))
+            if (stroke_count, radical) not in idc_options:
+                idc_options[stroke_count, radical] = (NO_FILTER, *index.idc_options(stroke_count, radical))
+            if (result.stroke_options == stroke_options and
+                    result.radical_options == radical_options[stroke_count] and
+                    result.component_idc_options == idc_options[stroke_count, radical] and
+                    not self._touches(query, result, affected, moved, dataset)):
+                engine.cache.put(query, result)
+        return engine
+
+    def _touches(self, query, result, affected, moved, dataset):
+        # The requested and the corrected selection both shaped the result
+        selected = {query.selected_comp, result.query.selected_comp} - {""}
+        if not affected.isdisjoint(selected):
+            return True
+        listed = affected.intersection(result.output_options)
+        for char in selected:
+            related = self.dataset.related_characters(char)
+            # Derived lists change when a character gains or loses the selected one as a component
+            if tuple(related) != tuple(dataset.related_characters(char)):
+                return True
+            if not affected.isdisjoint(self.all_components(char, COMPONENT_DEPTH)):
+                return True
+            # Related characters the output filters hid still set the filter options
+            listed.update(affected.intersection(related))
+        _, stroke_count, radical, component_idc, _, _, display_mode = result.query
+        for attributes in moved.values():
+            for attribute in attributes:
+                if attribute is not None and (
+                        (not stroke_count or attribute[0] == stroke_count) and
+                        (radical == NO_FILTER or attribute[1] == radical) and
+                        (component_idc == NO_FILTER or attribute[2] == component_idc)):
+                    return True
+        if not moved.keys().isdisjoint(listed):
+            return True
+        length = phrase_length(display_mode)
+        if length:
+            old, new = self.dataset.compounds, dataset.compounds
+            if any(old.compounds(c, length) != new.compounds(c, length) for c in listed):
+                return True
+        return False
+
+    def all_components(self, char, max_depth):
+        """Components reachable from char within max_depth + 1 decomposition levels."""
+        with METRICS.span("get_all_components"):
+            return self.dataset.graph.components(char, max_depth + 1)
+
+    def output_filter_options(self, chars):
+        """Result IDC and Result Radical options for a set of result characters."""
+        index = self.dataset.index
+        idcs = {index.get_idc(c) for c in chars}
+        radicals = {index.get_radical(c) for c in chars}
+        return (NO_FILTER, *sorted(idcs - {""})), (NO_FILTER, *sorted(radicals - {""}))
+
+    def char_compounds(self, chars, display_mode):
+        """Compounds per character for an Output Type, and the characters that have any."""
+        length = phrase_length(display_mode)
+        with METRICS.span("compounds"):
+            char_compounds = {c: self.dataset.compounds.compounds(c, length) for c in chars}
+            return MappingProxyType(char_compounds), [c for c in chars if not length or char_compounds[c]]
+
+    def compute(self, query):
+        """Run ``query`` without the cache.
+
+        Filters that no longer match fall back to "No Filter" and the selected
+        component to the first listed one, as the widgets would.
+        """
+        index = self.dataset.index
+        entries = self.dataset.entries
+        selected_comp, stroke_count, radical, component_idc, selected_idc, output_radical, display_mode = Query(*query)
+        with METRICS.span("filters.options"):
+            radical_options = (NO_FILTER, *index.radical_options(stroke_count))
+            if radical not in radical_options:
+                radical = NO_FILTER
+            component_idc_options = (NO_FILTER, *index.idc_options(stroke_count, radical))
+            if component_idc not in component_idc_options:
+                component_idc = NO_FILTER
+
+        # Add components from the selected character's decomposition
+        selected_char_components = self.all_components(selected_comp, COMPONENT_DEPTH) if selected_comp else ()
+        with METRICS.span("filters.components"):
+            sorted_components = tuple(index.filter_components(stroke_count, radical, component_idc, extra=selected_char_components))
+        if not sorted_components:
+            selected_comp = ""
+        elif selected_comp not in sorted_components:
+            selected_comp = sorted_components[0]
+
+        related = self.dataset.related_characters(selected_comp) if selected_comp else ()
+        with METRICS.span("filters.output"):
+            idc_options, output_radical_options = self.output_filter_options(related)
+            if selected_idc not in idc_options:
+                selected_idc = NO_FILTER
+            if output_radical not in output_radical_options:
+                output_radical = NO_FILTER
+            filtered_chars = [
+                c for c in related
+                if (selected_idc == NO_FILTER or index.get_idc(c) == selected_idc) and
+                (output_radical == NO_FILTER or index.get_radical(c) == output_radical)
+            ]
+        char_compounds, filtered_chars = self.char_compounds(filtered_chars, display_mode)
+
+        output_options = ()
+        if filtered_chars:
+            # Add components from the selected character's decomposition to output options
+            selected_char_components = self.all_components(selected_comp, COMPONENT_DEPTH)
+            output_options = index.sort_by_strokes(filtered_chars)
+            output_options.extend([comp for comp in selected_char_components if comp not in output_options and comp in entries])
+            output_options = tuple(index.sort_by_strokes(output_options))
+
+        return QueryResult(
+            query=Query(selected_comp, stroke_count, radical, component_idc, selected_idc, output_radical, display_mode),
+            stroke_options=tuple(index.stroke_options()),
+            radical_options=radical_options,
+            component_idc_options=component_idc_options,
+            components=sorted_components,
+            idc_options=idc_options,
+            output_radical_options=output_radical_options,
+            results=tuple(filtered_chars),
+            sorted_results=tuple(index.sort_by_strokes(filtered_chars)),
+            char_compounds=char_compounds,
+            output_options=output_options,
+        )
+
+    def run(self, query):
+        """Cached ``compute``, keyed by the requested query only.
+
+        A corrected query can compute to a different result (a corrected
+        selection still lists the closure of the requested one), so the
+        result is never stored under ``result.query``.
+        """
+        query = Query(*query)
+        with METRICS.span("query_result"):
+            return self.cache.get_or_compute(query, lambda: self.compute(query))
+
+    def multi(self, all_of=(), any_of=(), none_of=(), selected_idc=NO_FILTER, output_radical=NO_FILTER, display_mode=DISPLAY_MODES[0]):
+        """Characters containing all of / any of / none of the given components, in stroke order."""
+        search = self.dataset.search
+        with METRICS.span("filters.multi"):
+            idc_options, output_radical_options = self.output_filter_options(search.query(all_of, any_of, none_of))
+            if selected_idc not in idc_options:
+                selected_idc = NO_FILTER
+            if output_radical not in output_radical_options:
+                output_radical = NO_FILTER
+            filtered_chars = search.query(all_of, any_of, none_of, idc=selected_idc, radical=output_radical)
+        char_compounds, filtered_chars = self.char_compounds(filtered_chars, display_mode)
+        return MultiResult(selected_idc, output_radical, idc_options, output_radical_options, tuple(filtered_chars), char_compounds)
+
+    def passage(self, text):
+        """Every distinct character of a pasted passage with its shared components and radicals (cached by text)."""
+        with METRICS.span("batch.lookup"):
+            return self.passages.get_or_compute(text, lambda: self.dataset.passages.lookup(text, COMPONENT_DEPTH + 1))
+
+    def phrases(self, chars, display_mode=DISPLAY_MODES[0]):
+        """Sorted compounds of the Output Type's length (any for single characters) containing every one of chars."""
+        return self.dataset.compounds.phrases_containing(chars, phrase_length(display_mode))
+
+
+def _attributes(index, char):
+    """The (strokes, radical, IDC) a ComponentIndex filters ``char`` on, or None when it is not listed."""
+    if char not in index.ids:
+        return None
+    return index.get_strokes(char), index.get_radical(char), index.get_idc(char)
+
+
+def _display_mode(value):
+    if value in DISPLAY_MODES:
+        return value
+    if value.isdigit() and value != "1":
+        return next((m for m in DISPLAY_MODES if m.startswith(value)), DISPLAY_MODES[0])
+    return DISPLAY_MODES[0]
+
+
+def _record(engine, spec):
+    """Run one lookup described by a dict of Query fields, all/any/none/phrase components or search text."""
+    display_mode = _display_mode(str(spec.get("display_mode", DISPLAY_MODES[0])))
+    if spec.get("text"):
+        matches = engine.dataset.text_search.search(spec["text"])
+        return {"text": spec["text"], "results": [c for c, _ in matches], "scores": dict(matches)}
+    if spec.get("phrase"):
+        return {"phrase": spec["phrase"], "display_mode": display_mode, "results": engine.phrases(parse_components(spec["phrase"]), display_mode)}
+    if spec.get("all") or spec.get("any") or spec.get("none"):
+        components = {k: parse_components(spec.get(k) or "") for k in ("all", "any", "none")}
+        result = engine.multi(
+            components["all"], components["any"], components["none"],
+            spec.get("selected_idc", NO_FILTER), spec.get("output_radical", NO_FILTER), display_mode
+        )
+        return {
+            **{k: "".join(v) for k, v in components.items()},
+            "selected_idc": result.selected_idc,
+            "output_radical": result.output_radical,
+            "display_mode": display_mode,
+            "results": list(result.results),
+            "compounds": {c: list(result.char_compounds[c]) for c in result.results if result.char_compounds[c]},
+        }
+    fields = {k: spec[k] for k in Query._fields if k in spec}
+    fields["display_mode"] = display_mode
+    result = engine.run(Query(**fields))
+    return {
+        **result.query._asdict(),
+        "results": list(result.sorted_results),
+        "compounds": {c: list(result.char_compounds[c]) for c in result.sorted_results if result.char_compounds[c]},
+    }
+
+
+def _batch_specs(lines):
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield json.loads(line) if line.startswith("{") else {"selected_comp": line}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up Radix components without the Streamlit UI.")
+    parser.add_argument("component", nargs="?", help="component to look up")
+    parser.add_argument("--data", help="component map JSON (default: $RADIX_DATA_FILE or the app's data file)")
+    parser.add_argument("--strokes", type=int, default=0, help="component stroke-count filter")
+    parser.add_argument("--radical", default=NO_FILTER, help="component radical filter")
+    parser.add_argument("--idc", default=NO_FILTER, help="component structure filter")
+    parser.add_argument("--result-idc", default=NO_FILTER, help="result structure filter")
+    parser.add_argument("--result-radical", default=NO_FILTER, help="result radical filter")
+    parser.add_argument("--mode", default=DISPLAY_MODES[0], help="Output Type, or a phrase length 2-4")
+    parser.add_argument("--all", default="", help="multi-component search: contains all of these")
+    parser.add_argument("--any", default="", help="multi-component search: contains any of these")
+    parser.add_argument("--none", default="", help="multi-component search: contains none of these")
+    parser.add_argument("--phrase", default="", help="phrase search: compounds containing all of these")
+    parser.add_argument("--text", default="", help="text search over definitions, etymology and pinyin")
+    parser.add_argument("--batch", metavar="FILE", help="run one query per line ('-' for stdin) and print JSON lines")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+    args = parser.parse_args(argv)
+
+    dataset = load_dataset(args.data)
+    for msg in dataset.diagnostics:
+        if msg["type"] == "error":
+            print(f"error: {msg['message']}", file=sys.stderr)
+    if not len(dataset):
+        return 1
+    engine = QueryEngine(dataset)
+
+    if args.batch:
+        with (sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")) as f:
+            for spec in _batch_specs(f):
+                print(json.dumps(_record(engine, spec), ensure_ascii=False))
+        return 0
+
+    spec = {
+        "selected_comp": args.component or "", "stroke_count": args.strokes, "radical": args.radical,
+        "component_idc": args.idc, "selected_idc": args.result_idc, "output_radical": args.result_radical,
+        "display_mode": args.mode, "all": args.all, "any": args.any, "none": args.none, "phrase": args.phrase,
+        "text": args.text,
+    }
+    if not (spec["selected_comp"] or args.all or args.any or args.none or args.phrase or args.text):
+        parser.error("give a component, --all/--any/--none, --phrase, --text or --batch")
+    record = _record(engine, spec)
+    if args.json:
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{len(record['results'])} result(s)")
+    for char in record["results"]:
+        compounds = record.get("compounds", {}).get(char) if isinstance(char, str) and len(char) == 1 else None
+        print(f"{char}  {' '.join(compounds)}" if compounds else char)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
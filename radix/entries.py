@@ -0,0 +1,39 @@
+"""Helpers for raw component-map entries as they come out of the JSON file."""
+from types import MappingProxyType
+
+
+def freeze(value):
+    """Recursively turn dicts into mapping proxies and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def clean_entries(data):
+    """Blank out decompositions containing '?', keep only single-character related characters
+    and return the warnings raised.
+
+    Run once at load time, so lookups can trust every related character to
+    be a one-character string. ``python -m radix.validate`` checks the rest.
+    """
+    diagnostics = []
+    for char, entry in data.items():
+        decomposition = entry.get("meta", {}).get("decomposition", "")
+        if '?' in decomposition:
+            diagnostics.append({
+                "type": "warning",
+                "message": f"Invalid component '?' in decomposition for {char}: {decomposition}"
+            })
+            entry["meta"]["decomposition"] = ""
+        related = entry.get("related_characters")
+        if related is not None:
+            kept = [c for c in related if isinstance(c, str) and len(c) == 1] if isinstance(related, list) else []
+            if len(kept) != len(related):
+                diagnostics.append({
+                    "type": "warning",
+                    "message": f"Dropped malformed related characters of {char}: {related!r}"
+                })
+                entry["related_characters"] = kept
+    return diagnostics
@@ -0,0 +1,133 @@
+"""Compound exports streamed line by line from the compound index.
+
+Rows are produced lazily, one compound at a time, and encoded as they are
+read, so an export of thousands of components never holds the whole file
+in memory and nothing is built until a download is requested.
+"""
+import csv
+import io
+import json
+
+from radix.formatting import clean_field
+
+# Format label -> (file extension, MIME type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSONL": ("jsonl", "application/jsonl"),
+    "TXT": ("txt", "text/plain"),
+}
+FIELDS = ("compound", "pinyin", "definition", "source", "component")
+TXT_HEADER = "Give me the hanyu pinyin and meaning of each compound phrase in one line a phrase in a downloadable word file"
+
+
+class CompoundExporter:
+    """Export rows for the compounds listed under a set of characters.
+
+    ``source`` is the character whose entry lists the compound and
+    ``component`` the searched component it was reached from. Compounds
+    have no entries of their own, so ``pinyin`` joins the readings of their
+    characters and ``definition`` their glosses, unless the compound itself
+    is in the map.
+    """
+
+    def __init__(self, dataset):
+        self.entries = dataset.entries
+        self.compounds = dataset.compounds
+        self.related_characters = dataset.related_characters
+
+    def _meta(self, char):
+        return self.entries.get(char, {}).get("meta", {})
+
+    def pinyin(self, compound):
+        if compound in self.entries:
+            return clean_field(self._meta(compound).get("pinyin", "—"))
+        return " ".join(clean_field(self._meta(c).get("pinyin", "?")) for c in compound)
+
+    def definition(self, compound):
+        if compound in self.entries:
+            return clean_field(self._meta(compound).get("definition", "—"))
+        return " | ".join(f"{c}: {clean_field(self._meta(c).get('definition', '—'))}" for c in compound)
+
+    def rows(self, sources, length, component=""):
+        """Rows for the compounds of ``length`` listed under each of ``sources``, in order."""
+        for source in sources:
+            for compound in self.compounds.compounds(source, length):
+                yield {
+                    "compound": compound,
+                    "pinyin": self.pinyin(compound),
+                    "definition": self.definition(compound),
+                    "source": source,
+                    "component": component,
+                }
+
+    def component_rows(self, components, length):
+        """Rows for every character related to each of ``components`` (bulk export)."""
+        for component in components:
+            yield from self.rows(self.related_characters(component), length, component)
+
+
+def format_lines(rows, fmt):
+    """Encode rows as lines of ``fmt`` (a ``FORMATS`` key), header first."""
+    if fmt == "CSV":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    elif fmt == "JSONL":
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+    elif fmt == "TXT":
+        yield TXT_HEADER + "\n\n"
+        for row in rows:
+            yield row["compound"] + "\n"
+    else:
+        raise ValueError(f"unknown export format: {fmt}")
+
+
+class LineStream(io.RawIOBase):
+    """Read-only binary file over an iterator of text lines, encoded as UTF-8 on demand.
+
+    It cannot seek, except to rewind before anything was read.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._pending = b""
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset == 0 and whence in (io.SEEK_SET, io.SEEK_CUR) and not self._position:
+            return 0
+        raise io.UnsupportedOperation("LineStream can only be read forward")
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        n = 0
+        while n < size:
+            if not self._pending:
+                line = next(self._lines, None)
+                if line is None:
+                    break
+                self._pending = line.encode("utf-8")
+            chunk = self._pending[:size - n]
+            buffer[n:n + len(chunk)] = chunk
+            self._pending = self._pending[len(chunk):]
+            n += len(chunk)
+        self._position += n
+        return n
+
+
+def export_stream(rows, fmt):
+    """Binary file-like object producing ``rows`` in ``fmt`` as it is read."""
+    return LineStream(format_lines(rows, fmt))
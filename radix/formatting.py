@@ -0,0 +1,69 @@
+"""Text formatting for entry fields and selectbox labels."""
+
+
+def clean_field(field):
+    return field[0] if isinstance(field, (list, tuple)) and field else field or "—"
+
+
+def get_etymology_text(meta):
+    etymology = meta.get("etymology", {})
+    hint = clean_field(etymology.get("hint", "No hint available"))
+    details = clean_field(etymology.get("details", ""))
+    return f"{hint}{'; Details: ' + details if details and details != '—' else ''}"
+
+
+def decomposition_text(meta):
+    """Format the decomposition to show full structure, ignoring invalid components."""
+    decomposition = meta.get("decomposition", "")
+    if not decomposition or '?' in decomposition:
+        return "—"
+    return decomposition
+
+
+class LabelTable:
+    """Selectbox option labels, formatted once per character and shared by all sessions.
+
+    ``full`` is the detailed label the selectboxes always showed; ``short``
+    keeps only pinyin and stroke count for very long option lists. Strings
+    that are not characters of the dataset (placeholders) are returned as is.
+    """
+
+    def __init__(self, entries, index):
+        self.entries = entries
+        self.index = index
+        self._full = {}
+        self._short = {}
+
+    def adopt(self, previous, changed):
+        """Reuse the labels ``previous`` formatted for characters not in ``changed``."""
+        changed = set(changed)
+        self._full.update((c, label) for c, label in previous._full.items() if c not in changed)
+        self._short.update((c, label) for c, label in previous._short.items() if c not in changed)
+
+    def full(self, char):
+        label = self._full.get(char)
+        if label is None:
+            if char not in self.entries:
+                return char
+            meta = self.entries[char].get("meta", {})
+            label = self._full[char] = (
+                f"{char} (Pinyin: {clean_field(meta.get('pinyin', '—'))}, "
+                f"Strokes: {self.index.get_strokes(char) or 'unknown'}, "
+                f"Radical: {clean_field(meta.get('radical', '—'))}, "
+                f"Decomposition: {decomposition_text(meta)}, "
+                f"Definition: {clean_field(meta.get('definition', 'No definition available'))}, "
+                f"Etymology: {get_etymology_text(meta)})"
+            )
+        return label
+
+    def short(self, char):
+        label = self._short.get(char)
+        if label is None:
+            if char not in self.entries:
+                return char
+            meta = self.entries[char].get("meta", {})
+            label = self._short[char] = (
+                f"{char} ({clean_field(meta.get('pinyin', '—'))}, "
+                f"{self.index.get_strokes(char) or '?'} strokes)"
+            )
+        return label
@@ -0,0 +1,178 @@
+"""Ranked full-text search over definitions, etymology and pinyin."""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+
+from radix.search import is_han
+
+# Field weights; a token found in several fields of an entry keeps the highest
+CHAR_WEIGHT = 10.0
+PINYIN_WEIGHT = 3.0
+DEFINITION_WEIGHT = 3.0
+HINT_WEIGHT = 2.0
+DETAILS_WEIGHT = 1.0
+# Share of the weight a term earns when it is only a prefix of the token
+PREFIX_FACTOR = 0.5
+MIN_PREFIX = 2
+TOP_K = 50
+
+# Combining tone marks after NFD decomposition: macron, acute, caron, grave
+TONE_MARKS = {"\u0304": "1", "\u0301": "2", "\u030c": "3", "\u0300": "4"}
+STOPWORDS = frozenset(("a", "an", "and", "as", "at", "by", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with"))
+_WORD = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=65536)
+def normalize_term(word):
+    """Return (toneless, toned) keys for a word; toned is None without a tone.
+
+    Tone marks and tone numbers (``lǜ``, ``lü4``, ``lv4``) give the same toned
+    key ``lu4``; ü and v fold to u. Other words are just lowercased.
+    """
+    base = []
+    tone = None
+    for ch in unicodedata.normalize("NFD", word.lower()):
+        if ch in TONE_MARKS:
+            tone = TONE_MARKS[ch]
+        elif not unicodedata.combining(ch):
+            base.append(ch)
+    base = "".join(base)
+    if tone is None and len(base) > 1 and base[-1] in "12345" and base[:-1].isalpha():
+        base, tone = base[:-1], base[-1]
+    if tone:
+        base = base.replace("v", "u")
+    return base, (base + tone if tone and tone != "5" else None)
+
+
+def tokenize(text):
+    """Words and single Han characters of ``text``, in order."""
+    terms = []
+    for word in _WORD.findall(text):
+        if any(is_han(c) for c in word):
+            terms.extend(c for c in word if is_han(c))
+        elif word.lower() not in STOPWORDS:
+            terms.append(word)
+    return terms
+
+
+def _texts(field):
+    if isinstance(field, (list, tuple)):
+        return [t for t in field if isinstance(t, str)]
+    return [field] if isinstance(field, str) else []
+
+
+class TextSearch:
+    """Inverted index from words to the characters whose entries contain them.
+
+    Definition, etymology hint and details words are indexed lowercased,
+    pinyin readings both with their tone (``ma3``) and without (``ma``). The
+    vocabulary is sorted and its posting lists are stored back to back in
+    CSR form, so the tokens sharing a prefix are one contiguous slice. The
+    last term of a query is scored with ``np.maximum.at`` over its prefix
+    slice, earlier terms over their exact token only; the characters
+    matching every term are ranked with ``argpartition``, ties broken by
+    stroke order. Built on the first query.
+    """
+
+    def __init__(self, entries, index):
+        self.entries = entries
+        self.index = index
+        self._vocabulary = None
+
+    def _entry_tokens(self, meta, cold):
+        """Token -> weight for one entry, fields from the lowest weight up so the highest one wins."""
+        tokens = {}
+        etymology = cold.get("etymology")
+        if not isinstance(etymology, Mapping):
+            etymology = {}
+        for field, weight in ((etymology.get("details"), DETAILS_WEIGHT),
+                              (etymology.get("hint"), HINT_WEIGHT),
+                              (cold.get("definition"), DEFINITION_WEIGHT)):
+            for text in _texts(field):
+                # Han characters in glosses are found through CHAR_WEIGHT, not indexed as words
+                for word in _WORD.findall(text.lower()):
+                    if word.isascii() and word not in STOPWORDS:
+                        tokens[word] = weight
+        for reading in _texts(meta.get("pinyin")):
+            for word in _WORD.findall(reading):
+                for key in normalize_term(word):
+                    if key:
+                        tokens[key] = PINYIN_WEIGHT
+        return tokens
+
+    def build(self):
+        """Build the index now rather than on the first query."""
+        if self._vocabulary is not None:
+            return
+        # Snapshots hand out the text fields without filling their cache of decoded entries
+        cold_fields = getattr(self.entries, "cold_fields", None)
+        token_ids = {}
+        rows, cols, weights = [], [], []
+        for i, char in enumerate(self.index.chars):
+            meta = self.entries[char].get("meta", {})
+            tokens = self._entry_tokens(meta, cold_fields(char) if cold_fields else meta)
+            rows.extend(token_ids.setdefault(token, len(token_ids)) for token in tokens)
+            cols.extend([i] * len(tokens))
+            weights.extend(tokens.values())
+        vocabulary = sorted(token_ids)
+        rank = np.empty(len(token_ids), dtype=np.int32)
+        rank[[token_ids[t] for t in vocabulary]] = np.arange(len(vocabulary), dtype=np.int32)
+        rows = rank[np.asarray(rows, dtype=np.int32)]
+        order = np.argsort(rows, kind="stable")
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(vocabulary)))))
+        self._ids = np.asarray(cols, dtype=np.int32)[order]
+        self._weights = np.asarray(weights, dtype=np.float32)[order]
+        self._position = np.asarray(self.index.position, dtype=np.int64)
+        self._vocabulary = vocabulary
+        # Drop the rare snapshot shards this pass decoded
+        evict = getattr(self.entries, "evict_shards", None)
+        if evict:
+            evict()
+
+    def _term_scores(self, term, prefix=False):
+        scores = np.zeros(len(self.index.chars), dtype=np.float32)
+        if is_han(term[0]):
+            i = self.index.ids.get(term)
+            if i is not None:
+                scores[i] = CHAR_WEIGHT
+            return scores
+        toneless, toned = normalize_term(term)
+        vocabulary = self._vocabulary
+        key = toned or toneless
+        lo = bisect_left(vocabulary, key)
+        if lo < len(vocabulary) and vocabulary[lo] == key:
+            start, end = self._indptr[lo], self._indptr[lo + 1]
+            np.maximum.at(scores, self._ids[start:end], self._weights[start:end])
+        if prefix and not toned and len(key) >= MIN_PREFIX:
+            hi = bisect_left(vocabulary, key + "\uffff", lo)
+            start, end = self._indptr[lo], self._indptr[hi]
+            np.maximum.at(scores, self._ids[start:end], PREFIX_FACTOR * self._weights[start:end])
+        return scores
+
+    def search(self, text, k=TOP_K):
+        """Return up to ``k`` ``(character, score)`` pairs matching every term of ``text``, best first.
+
+        Only the last term also matches as a prefix, as it may still be being typed.
+        """
+        self.build()
+        words = tokenize(text)
+        terms = list(dict.fromkeys(words))
+        if not terms or not len(self.index.chars):
+            return []
+        total = None
+        for term in terms:
+            scores = self._term_scores(term, term == words[-1])
+            total = scores if total is None else np.where(total > 0, total + scores, 0) * (scores > 0)
+        candidates = np.flatnonzero(total)
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        # Higher score first, then stroke order
+        keys = total[candidates].astype(np.float64) * len(self._position) - self._position[candidates]
+        top = np.argpartition(-keys, k - 1)[:k]
+        top = top[np.argsort(-keys[top], kind="stable")]
+        return [(self.index.chars[candidates[i]], round(float(total[candidates[i]]), 2)) for i in top]
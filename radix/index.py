@@ -0,0 +1,145 @@
+"""Inverted indexes for the stroke / radical / IDC component filters."""
+from array import array
+from collections import defaultdict
+
+# Global IDC characters
+IDC_CHARS = {'⿰', '⿱', '⿲', '⿳', '⿴', '⿵', '⿶', '⿷', '⿸', '⿹', '⿺', '⿻'}
+
+NO_FILTER = "No Filter"
+# Code 0 is "no IDC"; codes index this tuple
+IDC_NAMES = ("", *sorted(IDC_CHARS))
+IDC_CODES = {idc: k for k, idc in enumerate(IDC_NAMES)}
+MAX_STROKES = 0xFFFF
+
+
+def parse_strokes(strokes):
+    """Return a positive stroke count from a raw ``strokes`` value, or None."""
+    try:
+        if isinstance(strokes, (int, float)) and strokes > 0:
+            return int(strokes)
+        elif isinstance(strokes, str) and strokes.isdigit():
+            return int(strokes)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def leading_idc(decomposition):
+    return decomposition[0] if decomposition and decomposition[0] in IDC_CHARS else ""
+
+
+class ComponentIndex:
+    """Posting lists over the single-character entries of a component map.
+
+    Every character gets a dense integer id in map order. Per-character
+    attributes are code columns in ``array``s: ``strokes`` (0 when
+    unknown), ``radical_codes`` into ``radical_names`` and ``idc_codes``
+    into ``IDC_NAMES``. Posting lists are ascending ``array('I')``s of ids
+    keyed by stroke count, radical and leading IDC, and ``stroke_order``
+    holds all ids sorted by stroke count (stable on map order), which is
+    the order every list in the UI is shown in.
+    """
+
+    def __init__(self, component_map):
+        # Snapshots hand out their code columns and id table, so no entry views are built
+        filter_columns = getattr(component_map, "filter_columns", None)
+        char_ids = getattr(component_map, "char_ids", None)
+        if filter_columns is not None and all(len(c) == 1 for c in char_ids):
+            self.chars = component_map.chars
+            self.ids = char_ids
+            self.strokes, self.radical_names, self.radical_codes, self.idc_codes = filter_columns()
+        else:
+            self._from_rows(component_map)
+        by_strokes = defaultdict(lambda: array("I"))
+        by_radical = defaultdict(lambda: array("I"))
+        by_idc = defaultdict(lambda: array("I"))
+        names = self.radical_names
+        no_radical = names.index("") if "" in names else -1
+        for i, (strokes, radical, idc) in enumerate(zip(self.strokes, self.radical_codes, self.idc_codes)):
+            if strokes:
+                by_strokes[strokes].append(i)
+            if radical != no_radical:
+                by_radical[radical].append(i)
+            if idc:
+                by_idc[idc].append(i)
+        self.by_strokes = dict(by_strokes)
+        self.by_radical = {names[k]: v for k, v in by_radical.items()}
+        self.by_idc = {IDC_NAMES[k]: v for k, v in by_idc.items()}
+        strokes = self.strokes
+        self.stroke_order = array("I", sorted(range(len(self.chars)), key=strokes.__getitem__))
+        self.position = array("I", bytes(4 * len(self.chars)))
+        for pos, i in enumerate(self.stroke_order):
+            self.position[i] = pos
+        self.radical_chars = tuple(c for c, k in zip(self.chars, self.radical_codes) if names[k] == c)
+
+    def _from_rows(self, component_map):
+        columns = getattr(component_map, "columns", None)
+        if columns is None:
+            metas = ((char, component_map[char].get("meta", {})) for char in component_map)
+            rows = ((char, m.get("strokes"), m.get("radical", ""), m.get("decomposition", "")) for char, m in metas)
+        else:
+            rows = columns()
+        rows = [row for row in rows if isinstance(row[0], str) and len(row[0]) == 1]
+        self.chars = tuple(row[0] for row in rows)
+        self.ids = {c: i for i, c in enumerate(self.chars)}
+        radicals = [row[2] if isinstance(row[2], str) else "" for row in rows]
+        self.radical_names = tuple(sorted({*radicals, ""}))
+        codes = {r: k for k, r in enumerate(self.radical_names)}
+        self.strokes = array("H", (min(parse_strokes(row[1]) or 0, MAX_STROKES) for row in rows))
+        self.radical_codes = array("H" if len(codes) <= 0xFFFF else "I", (codes[r] for r in radicals))
+        self.idc_codes = array("B", (IDC_CODES[leading_idc(row[3])] for row in rows))
+
+    def get_strokes(self, char):
+        i = self.ids.get(char)
+        return self.strokes[i] or None if i is not None else None
+
+    def get_radical(self, char):
+        i = self.ids.get(char)
+        return "" if i is None else self.radical_names[self.radical_codes[i]]
+
+    def get_idc(self, char):
+        i = self.ids.get(char)
+        return "" if i is None else IDC_NAMES[self.idc_codes[i]]
+
+    def matching(self, stroke_count=0, radical=NO_FILTER, idc=NO_FILTER):
+        """Return the set of ids passing the filters, or None when none are active."""
+        postings = []
+        if stroke_count:
+            postings.append(self.by_strokes.get(stroke_count, ()))
+        if radical != NO_FILTER:
+            postings.append(self.by_radical.get(radical, ()))
+        if idc != NO_FILTER:
+            postings.append(self.by_idc.get(idc, ()))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def stroke_options(self):
+        return sorted(self.by_strokes)
+
+    def radical_options(self, stroke_count=0):
+        ids = self.matching(stroke_count)
+        if ids is None:
+            return sorted(self.by_radical)
+        names, codes = self.radical_names, self.radical_codes
+        return sorted({names[codes[i]] for i in ids} - {""})
+
+    def idc_options(self, stroke_count=0, radical=NO_FILTER):
+        ids = self.matching(stroke_count, radical)
+        if ids is None:
+            return sorted(self.by_idc)
+        codes = self.idc_codes
+        return sorted({IDC_NAMES[codes[i]] for i in ids} - {""})
+
+    def filter_components(self, stroke_count=0, radical=NO_FILTER, idc=NO_FILTER, extra=()):
+        """Return the matching characters plus ``extra`` ones, in stroke order."""
+        ids = self.matching(stroke_count, radical, idc)
+        if ids is None:
+            return [self.chars[i] for i in self.stroke_order]
+        ids.update(self.ids[c] for c in extra if c in self.ids)
+        return [self.chars[i] for i in sorted(ids, key=self.position.__getitem__)]
+
+    def sort_by_strokes(self, chars):
+        """Stable sort of characters by stroke count (unknown counts first)."""
+        return sorted(chars, key=lambda c: self.get_strokes(c) or 0)
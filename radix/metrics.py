@@ -0,0 +1,149 @@
+"""Per-process timing spans with percentile summaries and file export.
+
+Spans are recorded only when metrics are enabled, which is read once from
+the environment:
+
+- ``RADIX_METRICS=1`` turns recording on
+- ``RADIX_METRICS_FILE`` is where ``maybe_export`` writes the summaries:
+  Prometheus text format, or one JSON line per export if it ends in ``.jsonl``
+
+When disabled, ``span`` hands back one shared no-op context manager, so
+instrumented code pays for a single attribute check.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 2048
+EXPORT_INTERVAL = 15.0
+
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """Count and total of all observations, quantiles over the latest ``WINDOW``."""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Named span histograms shared by every session of a process."""
+
+    def __init__(self, enabled=False, path=None):
+        self.enabled = enabled
+        self.path = path
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def span(self, name):
+        """Context manager timing the enclosed block under ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def summary(self):
+        """One row per span, durations in milliseconds."""
+        with self._lock:
+            items = sorted((name, h.count, h.total, h.quantiles()) for name, h in self.histograms.items())
+        return [
+            {
+                "span": name,
+                "count": count,
+                "mean_ms": round(1000 * total / count, 3),
+                **{f"p{round(q * 100)}_ms": round(1000 * v, 3) for q, v in quantiles.items()},
+            }
+            for name, count, total, quantiles in items
+        ]
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP radix_span_seconds Duration of instrumented parts of a Streamlit rerun.",
+            "# TYPE radix_span_seconds summary",
+        ]
+        with self._lock:
+            items = sorted((name, h.count, h.total, h.quantiles()) for name, h in self.histograms.items())
+        for name, count, total, quantiles in items:
+            for q, v in quantiles.items():
+                lines.append(f'radix_span_seconds{{span="{name}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'radix_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'radix_span_seconds_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """Write the current summaries to ``path`` (default: the configured file)."""
+        path = path or self.path
+        if not path:
+            return None
+        if path.endswith(".jsonl"):
+            record = {"time": time.time(), "pid": os.getpid(), "spans": self.summary()}
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        return path
+
+    def maybe_export(self, interval=EXPORT_INTERVAL):
+        """Export at most once per ``interval`` seconds; a no-op when disabled or unconfigured."""
+        if not self.enabled or not self.path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < interval:
+                return
+            self._last_export = now
+        self.export()
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+
+METRICS = Metrics(
+    enabled=os.environ.get("RADIX_METRICS", "").lower() in ("1", "true", "yes", "on"),
+    path=os.environ.get("RADIX_METRICS_FILE") or None,
+)
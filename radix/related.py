@@ -0,0 +1,164 @@
+"""Component -> character reverse indexes derived from the decompositions.
+
+The app serves these derived lists (the stored ones only with
+``RADIX_STORED_RELATED`` set). To bring the stored ``related_characters``
+lists of the file in line with ``meta.decomposition``::
+
+    python -m radix.related enhanced_component_map_with_etymology.json            # compare only
+    python -m radix.related map.json -o map.json --depth 2                        # rewrite the lists
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+class RelatedIndex:
+    """For every component, the characters containing it and how many levels down.
+
+    Postings hold character ids (``int32``, ascending) with a parallel
+    ``uint8`` depth array, 1 for direct components, and are read off the
+    memoized decomposition closures in one pass. Ids are given out in map
+    order and never reused, so after an edit only the postings of the
+    components it can reach are rewritten (see ``adopt``): the characters
+    whose closure can change are the edited ones plus those already
+    containing them, which the old postings list directly. Built on first
+    use.
+    """
+
+    def __init__(self, entries, graph):
+        self.entries = entries
+        self.graph = graph
+        self._postings = None
+
+    def build(self):
+        """Build the postings now rather than on the first lookup."""
+        if self._postings is not None:
+            return
+        self.chars = [c for c in self.entries if len(c) == 1]
+        self.ids = {c: i for i, c in enumerate(self.chars)}
+        rows, cols, depths = [], [], []
+        components = {}
+        for i, char in enumerate(self.chars):
+            parts, levels = self.graph.closure(char)
+            for part, depth in zip(parts, levels):
+                if part != char:
+                    rows.append(components.setdefault(part, len(components)))
+                    cols.append(i)
+                    depths.append(depth)
+        rows = np.asarray(rows, dtype=np.int32)
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(components)))))
+        cols = np.asarray(cols, dtype=np.int32)[order]
+        depths = np.minimum(np.asarray(depths, dtype=np.int64)[order], 255).astype(np.uint8)
+        # Slices of the two buffers; an update replaces a component's pair with new arrays
+        self._postings = {
+            part: (cols[indptr[k]:indptr[k + 1]], depths[indptr[k]:indptr[k + 1]])
+            for part, k in components.items()
+        }
+        # Walking every character read every rare decomposition; let the snapshot drop them again
+        evict = getattr(self.entries, "evict_shards", None)
+        if evict:
+            evict()
+
+    def postings(self, component, max_depth=None):
+        """Ascending ids of the characters containing ``component`` within ``max_depth`` levels (all when None)."""
+        self.build()
+        ids, depths = self._postings.get(component, (np.empty(0, np.int32), np.empty(0, np.uint8)))
+        if max_depth is not None:
+            ids = ids[depths <= max_depth]
+        return ids
+
+    def characters(self, component, max_depth=1):
+        """Characters containing ``component`` within ``max_depth`` levels, in map order."""
+        ids = self.postings(component, max_depth)
+        chars = self.chars
+        return tuple(chars[i] for i in ids.tolist())
+
+    def adopt(self, previous, changed):
+        """Take over the postings of ``previous`` and rewrite only those ``changed`` characters can reach.
+
+        Nothing is carried over when ``previous`` was never built.
+        """
+        if previous._postings is None:
+            return
+        self.chars = list(previous.chars)
+        self.ids = dict(previous.ids)
+        self._postings = dict(previous._postings)
+        changed = {c for c in changed if len(c) == 1}
+        affected = set(changed)
+        for char in changed:
+            affected.update(previous.characters(char, None))
+
+        removed, added = defaultdict(list), defaultdict(list)
+        for char in affected:
+            i = self.ids.get(char)
+            if i is None:
+                if char not in self.entries:
+                    continue
+                i = self.ids[char] = len(self.chars)
+                self.chars.append(char)
+            for part in previous.graph.components(char):
+                if part != char:
+                    removed[part].append(i)
+            if char in self.entries:
+                parts, levels = self.graph.closure(char)
+                for part, depth in zip(parts, levels):
+                    if part != char:
+                        added[part].append((i, depth))
+
+        for part in removed.keys() | added.keys():
+            ids, depths = self._postings.get(part, (np.empty(0, np.int32), np.empty(0, np.uint8)))
+            keep = ~np.isin(ids, removed.get(part, ()))
+            new = added.get(part, ())
+            ids = np.concatenate((ids[keep], np.fromiter((i for i, _ in new), dtype=np.int32, count=len(new))))
+            depths = np.concatenate((depths[keep], np.fromiter((min(d, 255) for _, d in new), dtype=np.uint8, count=len(new))))
+            order = np.argsort(ids, kind="stable")
+            if len(ids):
+                self._postings[part] = (ids[order], depths[order])
+            else:
+                self._postings.pop(part, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive related_characters from the decompositions of the component map.")
+    parser.add_argument("source", nargs="?", help="component map JSON (default: $RADIX_DATA_FILE or the app's data file)")
+    parser.add_argument("-o", "--output", help="write the map with derived related_characters here")
+    parser.add_argument("--depth", type=int, default=1, help="decomposition levels to include (0 for all)")
+    args = parser.parse_args(argv)
+    # The dataset builds a RelatedIndex itself
+    from radix.dataset import data_file, load_dataset
+
+    source = args.source or data_file()
+    dataset = load_dataset(source)
+    if not len(dataset):
+        for msg in dataset.diagnostics:
+            print(f"error: {msg['message']}", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    related = dataset.related
+    related.build()
+    depth = args.depth or None
+    derived = {char: related.characters(char, depth) for char in dataset.entries}
+    differing = sum(tuple(dataset.entries[c].get("related_characters", ())) != chars for c, chars in derived.items())
+    print(f"Derived related characters for {len(derived)} entries in {time.perf_counter() - started:.2f}s; "
+          f"{differing} differ from the stored lists", file=sys.stderr)
+    if args.output:
+        with open(source, "rb") as f:
+            data = json.loads(f.read())
+        for char, entry in data.items():
+            if char in derived:
+                entry["related_characters"] = list(derived[char])
+        tmp = f"{args.output}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
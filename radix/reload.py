@@ -0,0 +1,164 @@
+"""Background reloading of the component map file with incremental carry-over.
+
+``LiveDataset`` polls the data file and, once a change has settled, loads
+the new version on its own thread, diffs it against the current one and
+reuses whatever the edits cannot have changed: decomposition closures,
+formatted labels and cached query results (see ``QueryEngine.successor``).
+The dataset and its engine are then published together as one tuple, so a
+rerun that read ``current()`` keeps a consistent pair until it finishes.
+
+The poll interval comes from ``RADIX_RELOAD_INTERVAL`` (seconds, 0 to
+turn reloading off).
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+from radix.dataset import data_file, load_dataset
+from radix.engine import QueryEngine
+from radix.metrics import METRICS
+from radix.snapshot import COLD_FIELDS
+
+POLL_INTERVAL = 5.0
+
+DatasetChanges = namedtuple("DatasetChanges", ("added", "removed", "changed", "structural", "reordered"))
+DatasetChanges.__doc__ = """Differences between two versions of the component map.
+
+``changed`` lists characters whose entries differ in any field and
+``structural`` those whose non-text fields differ (strokes, radical,
+decomposition, related characters, pinyin, compounds), plus every added
+and removed one. ``reordered`` is set when the characters both versions
+share are listed in a different order.
+"""
+
+
+def _entry_parts(entries, snapshot):
+    """Function returning the (structural, text) parts of an entry for comparison."""
+    if snapshot:
+        return lambda char: (entries.hot_entry(char), entries.cold_blob(char))
+
+    def parts(char):
+        entry = entries[char]
+        meta = entry.get("meta", {})
+        hot = {**entry, "meta": {k: v for k, v in meta.items() if k not in COLD_FIELDS}}
+        return hot, {k: meta[k] for k in COLD_FIELDS if k in meta}
+    return parts
+
+
+def diff_datasets(old, new):
+    old_entries, new_entries = old.entries, new.entries
+    added = tuple(c for c in new_entries if c not in old_entries)
+    removed = tuple(c for c in old_entries if c not in new_entries)
+    # Two snapshots compare their stored parts without decoding the text fields
+    snapshots = hasattr(old_entries, "hot_entry") and hasattr(new_entries, "hot_entry")
+    old_parts, new_parts = _entry_parts(old_entries, snapshots), _entry_parts(new_entries, snapshots)
+    changed, structural = [], [*added, *removed]
+    for char in new_entries:
+        if char not in old_entries:
+            continue
+        (old_hot, old_cold), (new_hot, new_cold) = old_parts(char), new_parts(char)
+        if old_hot != new_hot:
+            changed.append(char)
+            structural.append(char)
+        elif old_cold != new_cold:
+            changed.append(char)
+    reordered = [c for c in old_entries if c in new_entries] != [c for c in new_entries if c in old_entries]
+    if snapshots:
+        new_entries.evict_shards()
+    return DatasetChanges(added, removed, tuple(changed), tuple(structural), reordered)
+
+
+class LiveDataset:
+    """The component map at ``path`` and its query engine, reloaded when the file changes.
+
+    ``warm`` is called with each new engine before it is published, so
+    reloads can prepare caches off the request path.
+    """
+
+    def __init__(self, path=None, interval=None, warm=None):
+        self.path = path or data_file()
+        if interval is None:
+            interval = float(os.environ.get("RADIX_RELOAD_INTERVAL", POLL_INTERVAL))
+        self.interval = interval
+        self.warm = warm
+        self.reloads = 0
+        self.last_changes = None
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stat = self._pending = self._file_stat()
+        dataset = load_dataset(self.path)
+        engine = QueryEngine(dataset)
+        if warm:
+            warm(engine)
+        self.loaded_at = time.time()
+        self._current = (dataset, engine)
+
+    def current(self):
+        """The latest ``(dataset, engine)`` pair."""
+        return self._current
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="radix-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling; the thread exits after a reload already under way."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = f"Reload of {self.path} failed: {e}"
+
+    def check(self):
+        """Reload if the file changed and has not changed since the previous check."""
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return False
+        if stat != self._pending:
+            # Still being written, or just written: wait for it to settle
+            self._pending = stat
+            return False
+        return self.reload()
+
+    def reload(self):
+        """Load the file now and publish it if its contents changed; True when published."""
+        with self._reload_lock, METRICS.span("dataset.reload"):
+            stat = self._file_stat()
+            old, old_engine = self._current
+            new = load_dataset(self.path)
+            errors = [d["message"] for d in new.diagnostics if d["type"] == "error"]
+            if not len(new) and errors:
+                self.last_error = errors[0]
+                self._stat = stat
+                return False
+            self.last_error = None
+            self._stat = self._pending = stat
+            if new.version == old.version:
+                return False
+            changes = diff_datasets(old, new)
+            new.graph.adopt(old.graph, changes.structural)
+            new.labels.adopt(old.labels, changes.changed)
+            new.related.adopt(old.related, changes.structural)
+            engine = old_engine.successor(new, changes)
+            if self.warm:
+                self.warm(engine)
+            self._current = (new, engine)
+            self.last_changes = changes
+            self.loaded_at = time.time()
+            self.reloads += 1
+            return True
@@ -0,0 +1,110 @@
+"""Multi-component AND / OR / NOT queries over membership bitsets."""
+import unicodedata
+
+from radix.index import NO_FILTER
+
+
+def bits_from_ids(ids, size):
+    buf = bytearray((size + 7) // 8)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def ids_from_bits(bits):
+    """Yield the positions of the set bits of ``bits`` in ascending order."""
+    digits = bin(bits)[:1:-1]
+    i = digits.find("1")
+    while i != -1:
+        yield i
+        i = digits.find("1", i + 1)
+
+
+def is_han(char):
+    """True for CJK characters, components and radicals; CJK punctuation and fullwidth forms are not."""
+    code = ord(char)
+    return code >= 0x2E80 and not 0xFF00 <= code <= 0xFFEF and unicodedata.category(char)[0] not in "PZ"
+
+
+def parse_components(text):
+    """Split free text into its distinct non-whitespace characters."""
+    return tuple(dict.fromkeys(c for c in text if not c.isspace()))
+
+
+class ComponentSearch:
+    """Character sets as Python integers over the dense ids of a ComponentIndex.
+
+    A component's membership bitset has one bit per character in its related
+    characters (``Dataset.related_characters``), so a query for a single component returns the
+    same characters as the regular component view. Bitsets are built on first
+    use and kept for the life of the process; radical and IDC filters reuse
+    the index posting lists.
+    """
+
+    def __init__(self, related_characters, index):
+        self.related_characters = related_characters
+        self.index = index
+        self.universe = (1 << len(index.chars)) - 1
+        self._members = {}
+        self._radicals = {}
+        self._idcs = {}
+
+    def members(self, component):
+        bits = self._members.get(component)
+        if bits is None:
+            ids = self.index.ids
+            related = self.related_characters(component)
+            bits = self._members[component] = bits_from_ids(
+                (ids[c] for c in related if c in ids), len(self.index.chars)
+            )
+        return bits
+
+    def radical_bits(self, radical):
+        bits = self._radicals.get(radical)
+        if bits is None:
+            bits = self._radicals[radical] = bits_from_ids(self.index.by_radical.get(radical, ()), len(self.index.chars))
+        return bits
+
+    def idc_bits(self, idc):
+        bits = self._idcs.get(idc)
+        if bits is None:
+            bits = self._idcs[idc] = bits_from_ids(self.index.by_idc.get(idc, ()), len(self.index.chars))
+        return bits
+
+    def query_bits(self, all_of=(), any_of=(), none_of=(), idc=NO_FILTER, radical=NO_FILTER):
+        if not all_of and not any_of:
+            bits = self.universe if none_of else 0
+        else:
+            bits = self.universe
+        for component in all_of:
+            bits &= self.members(component)
+        if any_of:
+            union = 0
+            for component in any_of:
+                union |= self.members(component)
+            bits &= union
+        for component in none_of:
+            bits &= ~self.members(component)
+        if idc != NO_FILTER:
+            bits &= self.idc_bits(idc)
+        if radical != NO_FILTER:
+            bits &= self.radical_bits(radical)
+        return bits
+
+    def query(self, all_of=(), any_of=(), none_of=(), idc=NO_FILTER, radical=NO_FILTER):
+        """Return the matching characters in stroke order."""
+        bits = self.query_bits(all_of, any_of, none_of, idc, radical)
+        position = self.index.position
+        chars = self.index.chars
+        return [chars[i] for i in sorted(ids_from_bits(bits), key=position.__getitem__)]
+
+
+def describe_query(all_of=(), any_of=(), none_of=()):
+    parts = []
+    if all_of:
+        parts.append(" + ".join(all_of))
+    if any_of:
+        parts.append("any of " + " ".join(any_of))
+    if none_of:
+        parts.append("not " + " ".join(none_of))
+    return ", ".join(parts)
@@ -0,0 +1,574 @@
+"""Compiled, memory-mapped snapshots of the component map.
+
+A snapshot keeps the hot fields every rerun needs (strokes, radical,
+decomposition, related characters, pinyin, compounds) as columns in
+compact JSON sections, and stores the cold text fields (definition,
+etymology) as one JSON blob per character behind an offset table. Cold
+blobs are only decoded when a character is actually rendered.
+
+In memory the columns stay columns: stroke counts, interned radical codes
+and leading-IDC codes in ``array``s, interned pinyin strings, and
+decompositions, compounds and related characters each stored back to back
+in one string. Entries are handed out as small ``__slots__`` views over
+them instead of nested dicts, which takes several times less memory per
+process than one dict per entry.
+
+The hot section is split by Unicode block. A directory, decoded at
+startup, holds the character table and the stroke, radical and IDC codes
+of every character: the filters and the stroke-ordered lists cover every
+block, so these few bytes per character stay resident for all of them.
+Everything else is sharded, decompositions included. The core shard,
+always resident, covers the URO block, radicals, strokes and every
+character used as a component, so decomposition walks from core
+characters never leave it. The rare blocks (Extensions A to I,
+compatibility ideographs) get one shard per block, decoded the first
+time one of their records or decompositions is read and dropped again
+least recently used first once the decoded shards exceed
+``RADIX_SHARD_BUDGET_MB``. Structures derived from every character
+(the related-character index, the similarity matrix, the text index) are
+built by full scans that read each rare shard once and evict it after,
+and then hold their own compact arrays for all blocks.
+
+Layout: header | directory JSON | shard JSON, core first ... (padded to 8 bytes) | offsets (uint64 * n+1) | cold blobs
+
+Compile from the command line with ``python -m radix.snapshot``.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+
+from radix.decomposition import direct_components
+from radix.entries import clean_entries, freeze
+from radix.index import IDC_CODES, leading_idc, parse_strokes
+
+MAGIC = b"RADXSNAP"
+FORMAT_VERSION = 6
+HEADER = struct.Struct("<8sI32sqqQQQQ")  # magic, version, sha256, size, mtime_ns, hot_len, count, cold_len, directory_len
+COLD_FIELDS = ("definition", "etymology")
+COLD_CACHE_SIZE = 4096
+# Hot fields stored as columns; other fields and values of other types are kept per entry
+META_COLUMNS = ("pinyin", "strokes", "radical", "decomposition", "compounds")
+RELATED_BIT = 1 << len(META_COLUMNS)
+META_BIT = RELATED_BIT << 1
+EXTRA_BIT = META_BIT << 1
+DECOMPOSITION_BIT = 1 << META_COLUMNS.index("decomposition")
+MAX_STROKES = 0xFFFF
+# Joins the items of list fields within one string
+SEPARATOR = "\x1f"
+SHARD_COLUMNS = ("decomposition", "pinyin", "compounds", "related")
+CORE_SHARD = "core"
+# Blocks whose characters get a shard of their own unless they are components; the rest is core
+RARE_BLOCKS = (
+    (0x3400, 0x4DBF, "ext-a"), (0xF900, 0xFAFF, "compat"), (0x20000, 0x2A6DF, "ext-b"),
+    (0x2A700, 0x2B73F, "ext-c"), (0x2B740, 0x2B81F, "ext-d"), (0x2B820, 0x2CEAF, "ext-e"),
+    (0x2CEB0, 0x2EBEF, "ext-f"), (0x2EBF0, 0x2EE5F, "ext-i"), (0x2F800, 0x2FA1F, "compat-sup"),
+    (0x30000, 0x3134F, "ext-g"), (0x31350, 0x323AF, "ext-h"),
+)
+SHARD_BUDGET_MB = 64
+
+
+def shard_budget():
+    """Bytes of encoded shards kept decoded at once: ``RADIX_SHARD_BUDGET_MB`` if set, else ``SHARD_BUDGET_MB``."""
+    return int(float(os.environ.get("RADIX_SHARD_BUDGET_MB", SHARD_BUDGET_MB)) * (1 << 20))
+
+
+def block_shard(char):
+    """The shard of a character by Unicode block alone: a rare block's name, else the core."""
+    if len(char) == 1:
+        cp = ord(char)
+        for first, last, name in RARE_BLOCKS:
+            if first <= cp <= last:
+                return name
+    return CORE_SHARD
+
+
+def _joinable(value):
+    return isinstance(value, list) and all(isinstance(v, str) and SEPARATOR not in v for v in value)
+
+
+def encode_hot(entry):
+    """Split the hot part of an entry into its column values and the fields columns cannot hold.
+
+    Returns ``(present, strokes, radical, decomposition, pinyin, compounds,
+    related, extra)``: ``present`` has a bit per stored column, list fields
+    are joined into one string and ``extra`` holds everything else.
+    ``strokes`` is the parsed count (0 when unknown) even when the raw value
+    is kept in ``extra``, so the filters never need it.
+    """
+    present = 0
+    strokes, radical, decomposition, pinyin, compounds, related = 0, "", "", "", "", ""
+    extra = {k: v for k, v in entry.items() if k not in ("meta", "related_characters")}
+    meta = entry.get("meta")
+    if isinstance(meta, dict):
+        present |= META_BIT
+        extra_meta = {}
+        for key, value in meta.items():
+            if key in COLD_FIELDS:
+                continue
+            if key == "strokes" and not (type(value) is int and 0 <= value <= MAX_STROKES):
+                strokes = parse_strokes(value) or 0
+                if strokes > MAX_STROKES:
+                    strokes = 0
+                extra_meta[key] = value
+                continue
+            if key == "strokes":
+                strokes = value
+            elif key in ("radical", "decomposition") and isinstance(value, str):
+                if key == "radical":
+                    radical = value
+                else:
+                    decomposition = value
+            elif key in ("pinyin", "compounds") and _joinable(value):
+                if key == "pinyin":
+                    pinyin = SEPARATOR.join(value)
+                else:
+                    compounds = SEPARATOR.join(value)
+            else:
+                extra_meta[key] = value
+                continue
+            present |= 1 << META_COLUMNS.index(key)
+        if extra_meta:
+            extra["meta"] = extra_meta
+    elif "meta" in entry:
+        extra["meta"] = meta
+    value = entry.get("related_characters")
+    if isinstance(value, list) and all(isinstance(c, str) and len(c) == 1 for c in value):
+        present |= RELATED_BIT
+        related = "".join(value)
+    elif "related_characters" in entry:
+        extra["related_characters"] = value
+    if extra:
+        present |= EXTRA_BIT
+    return present, strokes, radical, decomposition, pinyin, compounds, related, extra
+
+
+def snapshot_path_for(source):
+    return os.path.splitext(source)[0] + ".radx"
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.digest()
+
+
+def compile_snapshot(source, target=None):
+    """Compile ``source`` JSON into a snapshot file and return its path."""
+    target = target or snapshot_path_for(source)
+    stat = os.stat(source)
+    with open(source, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    diagnostics = clean_entries(data)
+
+    chars, blobs = [], []
+    columns = {name: [] for name in ("present", "strokes", "radical", "decomposition", "pinyin", "compounds", "related")}
+    extras = {}
+    for i, (char, entry) in enumerate(data.items()):
+        meta = entry.get("meta", {})
+        cold = {k: meta[k] for k in COLD_FIELDS if k in meta} if isinstance(meta, dict) else {}
+        *values, extra = encode_hot(entry)
+        for column, value in zip(columns.values(), values):
+            column.append(value)
+        if extra:
+            extras[i] = extra
+        chars.append(char)
+        blobs.append(json.dumps(cold, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    radicals = sorted(set(columns["radical"]))
+    codes = {r: i for i, r in enumerate(radicals)}
+    columns["radical"] = [codes[r] for r in columns["radical"]]
+
+    # Components and radicals stay resident whatever block they are in
+    resident = set(radicals)
+    for decomposition in columns["decomposition"]:
+        resident.update(direct_components(decomposition))
+    names = [CORE_SHARD]
+    shard_ids = {CORE_SHARD: 0}
+    shard_of, members = [], [[]]
+    for i, char in enumerate(chars):
+        name = CORE_SHARD if char in resident else block_shard(char)
+        if name not in shard_ids:
+            shard_ids[name] = len(names)
+            names.append(name)
+            members.append([])
+        shard_of.append(shard_ids[name])
+        members[shard_ids[name]].append(i)
+
+    def shard_payload(ids):
+        payload = {name: [columns[name][i] for i in ids] for name in SHARD_COLUMNS}
+        payload["extra"] = {local: extras[i] for local, i in enumerate(ids) if i in extras}
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    payloads = [shard_payload(ids) for ids in members]
+    spans, position = [], 0
+    for name, payload in zip(names, payloads):
+        spans.append([name, position, len(payload)])
+        position += len(payload)
+    directory = json.dumps(
+        {"chars": chars, "radicals": radicals, **{k: columns[k] for k in ("present", "strokes", "radical")},
+         "idc": [IDC_CODES[leading_idc(d)] for d in columns["decomposition"]],
+         "shard": shard_of, "shards": spans, "diagnostics": diagnostics},
+        ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    hot = directory + b"".join(payloads)
+    hot += b" " * (-len(hot) % 8)
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha256(raw).digest(), stat.st_size,
+                            stat.st_mtime_ns, len(hot), len(chars), offsets[-1], len(directory)))
+        f.write(hot)
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.writelines(blobs)
+    os.replace(tmp, target)
+    return target
+
+
+def read_header(path):
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) != HEADER.size:
+        return None
+    fields = HEADER.unpack(header)
+    if fields[0] != MAGIC or fields[1] != FORMAT_VERSION:
+        return None
+    return fields
+
+
+def is_stale(source, target):
+    """True when ``target`` is missing, from another format version or built from other bytes."""
+    header = read_header(target)
+    if header is None:
+        return True
+    _, _, digest, size, mtime_ns, _, _, _, _ = header
+    stat = os.stat(source)
+    if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+        return False
+    return file_digest(source) != digest
+
+
+def ensure_snapshot(source, target=None):
+    """Return an up-to-date snapshot path for ``source``, compiling it if needed."""
+    target = target or snapshot_path_for(source)
+    if is_stale(source, target):
+        compile_snapshot(source, target)
+    return target
+
+
+class StringColumn:
+    """Strings stored back to back in one ``str`` with an offset table, one per record."""
+
+    __slots__ = ("_text", "_offsets")
+
+    def __init__(self, values):
+        offsets = array("I", [0])
+        total = 0
+        for value in values:
+            total += len(value)
+            offsets.append(total)
+        self._text = "".join(values)
+        self._offsets = offsets
+
+    def __getitem__(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+class Shard:
+    """Decoded decompositions, pinyin, compounds, related characters and extra fields of one shard's records."""
+
+    __slots__ = ("decomposition", "pinyin", "compounds", "related", "extra", "size")
+
+    def __init__(self, payload, size):
+        self.decomposition = StringColumn(payload["decomposition"])
+        # Readings repeat across characters, so one string object serves them all
+        self.pinyin = [sys.intern(p) for p in payload["pinyin"]]
+        self.compounds = StringColumn(payload["compounds"])
+        self.related = StringColumn(payload["related"])
+        self.extra = {int(i): freeze(extra) for i, extra in payload["extra"].items()}
+        self.size = size
+
+
+class RecordMeta(Mapping):
+    """``meta`` view of one snapshot record; the cold text fields are decoded on first access."""
+
+    __slots__ = ("_snapshot", "_id")
+
+    def __init__(self, snapshot, char_id):
+        self._snapshot = snapshot
+        self._id = char_id
+
+    def __getitem__(self, key):
+        if key in COLD_FIELDS:
+            return self._snapshot.cold(self._id)[key]
+        snapshot, i = self._snapshot, self._id
+        bit = 1 << META_COLUMNS.index(key) if key in META_COLUMNS else 0
+        if snapshot._present[i] & bit:
+            if key == "strokes":
+                return snapshot._strokes[i]
+            if key == "radical":
+                return snapshot._radical_names[snapshot._radicals[i]]
+        shard, local = snapshot.shard(i)
+        if not snapshot._present[i] & bit:
+            return shard.extra[local]["meta"][key]
+        if key == "decomposition":
+            return shard.decomposition[local]
+        joined = shard.pinyin[local] if key == "pinyin" else shard.compounds[local]
+        return tuple(joined.split(SEPARATOR)) if joined else ()
+
+    def __iter__(self):
+        snapshot = self._snapshot
+        present = snapshot._present[self._id]
+        yield from (key for k, key in enumerate(META_COLUMNS) if present & (1 << k))
+        extra = snapshot.extra(self._id)
+        if "meta" in extra:
+            yield from extra["meta"]
+        yield from snapshot.cold(self._id)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Record(Mapping):
+    """Entry view of one snapshot record, compatible with the frozen JSON entries."""
+
+    __slots__ = ("_snapshot", "_id")
+
+    def __init__(self, snapshot, char_id):
+        self._snapshot = snapshot
+        self._id = char_id
+
+    def __getitem__(self, key):
+        snapshot, i = self._snapshot, self._id
+        if key == "meta" and snapshot._present[i] & META_BIT:
+            return RecordMeta(snapshot, i)
+        if key == "related_characters" and snapshot._present[i] & RELATED_BIT:
+            shard, local = snapshot.shard(i)
+            return tuple(shard.related[local])
+        return snapshot.extra(i)[key]
+
+    def __iter__(self):
+        present = self._snapshot._present[self._id]
+        if present & META_BIT:
+            yield "meta"
+        if present & RELATED_BIT:
+            yield "related_characters"
+        extra = self._snapshot.extra(self._id)
+        yield from (key for key in extra if not (key == "meta" and present & META_BIT))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Snapshot(Mapping):
+    """Read-only character -> entry mapping backed by a memory-mapped snapshot.
+
+    ``char_ids`` maps each character to its dense id, the row of its record
+    in every directory column; a ComponentIndex shares the stroke, radical
+    and IDC code columns instead of copying them. Rare shards are decoded on first use and
+    evicted least recently used first past ``budget`` bytes.
+    """
+
+    def __init__(self, path, budget=None):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, digest, _, _, hot_len, count, _, directory_len = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} Radix snapshot")
+        self.version = digest.hex()[:16]
+        directory = json.loads(self._mm[HEADER.size:HEADER.size + directory_len])
+        self.diagnostics = tuple(directory["diagnostics"])
+        self.chars = tuple(directory["chars"])
+        self.char_ids = {char: i for i, char in enumerate(self.chars)}
+        self._present = array("B", directory["present"])
+        self._strokes = array("H", directory["strokes"])
+        self._radical_names = tuple(sys.intern(r) for r in directory["radicals"])
+        self._radicals = array("H" if len(self._radical_names) <= 0xFFFF else "I", directory["radical"])
+        self._idcs = array("B", directory["idc"])
+
+        payload_start = HEADER.size + directory_len
+        self.shard_names = tuple(name for name, _, _ in directory["shards"])
+        self._spans = [(payload_start + begin, length) for _, begin, length in directory["shards"]]
+        self._shard_of = array("B" if len(self._spans) <= 0xFF else "H", directory["shard"])
+        counts = [0] * len(self._spans)
+        self._local = array("I", bytes(4 * len(self.chars)))
+        for i, k in enumerate(self._shard_of):
+            self._local[i] = counts[k]
+            counts[k] += 1
+        self.budget = shard_budget() if budget is None else budget
+        self._shards = OrderedDict()
+        self._shard_lock = threading.Lock()
+        self.shard_loads = 0
+        self.shard_evictions = 0
+        self._core = self._decode_shard(0)
+
+        start = HEADER.size + hot_len
+        self._offsets = memoryview(self._mm)[start:start + 8 * (count + 1)].cast("Q")
+        self._cold_start = start + 8 * (count + 1)
+        self.cold = lru_cache(maxsize=COLD_CACHE_SIZE)(self._decode_cold)
+
+    def _decode_shard(self, k):
+        begin, length = self._spans[k]
+        return Shard(json.loads(self._mm[begin:begin + length]), length)
+
+    def shard(self, char_id):
+        """``(Shard, local index)`` of a record, decoding its shard if it is not resident."""
+        k = self._shard_of[char_id]
+        if not k:
+            return self._core, self._local[char_id]
+        with self._shard_lock:
+            shard = self._shards.get(k)
+            if shard is not None:
+                self._shards.move_to_end(k)
+                return shard, self._local[char_id]
+        shard = self._decode_shard(k)
+        with self._shard_lock:
+            if k not in self._shards:
+                self._shards[k] = shard
+                self.shard_loads += 1
+                resident = sum(s.size for s in self._shards.values())
+                while resident > self.budget and len(self._shards) > 1:
+                    _, evicted = self._shards.popitem(last=False)
+                    resident -= evicted.size
+                    self.shard_evictions += 1
+            else:
+                shard = self._shards[k]
+        return shard, self._local[char_id]
+
+    def shard_stats(self):
+        """Resident shards and load / eviction counts."""
+        with self._shard_lock:
+            resident = [self.shard_names[k] for k in self._shards]
+            size = sum(s.size for s in self._shards.values())
+        return {
+            "shards": len(self.shard_names), "resident": [CORE_SHARD, *resident], "resident_bytes": self._core.size + size,
+            "budget_bytes": self.budget, "loads": self.shard_loads, "evictions": self.shard_evictions,
+        }
+
+    def evict_shards(self):
+        """Drop every resident rare shard, e.g. after a full scan decoded them all."""
+        with self._shard_lock:
+            self.shard_evictions += len(self._shards)
+            self._shards.clear()
+
+    def extra(self, char_id):
+        """Fields of a record the columns could not hold (usually none)."""
+        if not self._present[char_id] & EXTRA_BIT:
+            return {}
+        shard, local = self.shard(char_id)
+        return shard.extra.get(local, {})
+
+    def _decode_cold(self, char_id):
+        begin = self._cold_start + self._offsets[char_id]
+        end = self._cold_start + self._offsets[char_id + 1]
+        return freeze(json.loads(self._mm[begin:end]))
+
+    def filter_columns(self):
+        """``(strokes, radical_names, radical_codes, idc_codes)`` columns for a ComponentIndex, shared, not copied."""
+        return self._strokes, self._radical_names, self._radicals, self._idcs
+
+    def decomposition(self, char):
+        """The decomposition of ``char`` ("" when it has none or no entry), without building an entry view."""
+        i = self.char_ids.get(char)
+        if i is None:
+            return ""
+        present = self._present[i]
+        if present & DECOMPOSITION_BIT:
+            shard, local = self.shard(i)
+            return shard.decomposition[local]
+        if present & EXTRA_BIT:
+            return self.extra(i).get("meta", {}).get("decomposition", "")
+        return ""
+
+    def columns(self):
+        """Rows of ``(char, strokes, radical, decomposition)`` for every record.
+
+        ``strokes`` is the stored value (None when absent) and ``radical`` and
+        ``decomposition`` are "" when absent, as ``meta.get`` would give them.
+        Decompositions live in the shards, so this decodes all of them; the
+        filters use ``filter_columns`` instead.
+        """
+        strokes_bit = 1 << META_COLUMNS.index("strokes")
+        radical_bit = 1 << META_COLUMNS.index("radical")
+        decomposition_bit = 1 << META_COLUMNS.index("decomposition")
+        names = self._radical_names
+        for i, char in enumerate(self.chars):
+            present = self._present[i]
+            if present & EXTRA_BIT:
+                meta = self[char].get("meta", {})
+                yield char, meta.get("strokes"), meta.get("radical", ""), meta.get("decomposition", "")
+            else:
+                yield (char, self._strokes[i] if present & strokes_bit else None,
+                       names[self._radicals[i]] if present & radical_bit else "",
+                       self.decomposition(char) if present & decomposition_bit else "")
+
+    def hot_entry(self, char):
+        """The stored hot fields of ``char`` as one tuple, for cheap equality checks across snapshots."""
+        i = self.char_ids[char]
+        shard, local = self.shard(i)
+        return (self._present[i], self._strokes[i], self._radical_names[self._radicals[i]], shard.decomposition[local],
+                shard.pinyin[local], shard.compounds[local], shard.related[local], shard.extra.get(local))
+
+    def cold_blob(self, char):
+        """The encoded cold fields of ``char``, for cheap equality checks."""
+        char_id = self.char_ids[char]
+        return self._mm[self._cold_start + self._offsets[char_id]:self._cold_start + self._offsets[char_id + 1]]
+
+    def cold_fields(self, char):
+        """Cold fields of ``char`` decoded without the cache, for one-pass scans over every entry."""
+        char_id = self.char_ids[char]
+        begin = self._cold_start + self._offsets[char_id]
+        end = self._cold_start + self._offsets[char_id + 1]
+        return json.loads(self._mm[begin:end])
+
+    def __getitem__(self, char):
+        return Record(self, self.char_ids[char])
+
+    def __contains__(self, char):
+        return char in self.char_ids
+
+    def __iter__(self):
+        return iter(self.chars)
+
+    def __len__(self):
+        return len(self.chars)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the component map JSON into a Radix snapshot.")
+    parser.add_argument("source", nargs="?", default="enhanced_component_map_with_etymology.json")
+    parser.add_argument("-o", "--output", help="snapshot path (default: alongside the source, .radx)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the snapshot is up to date")
+    args = parser.parse_args(argv)
+    target = args.output or snapshot_path_for(args.source)
+    if not args.force and not is_stale(args.source, target):
+        print(f"{target} is up to date")
+        return 0
+    started = time.perf_counter()
+    compile_snapshot(args.source, target)
+    print(f"Compiled {args.source} -> {target} in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
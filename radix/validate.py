@@ -0,0 +1,289 @@
+"""Offline integrity checks over the component map, run across a process pool.
+
+Checks, each issue reported with its check name, character and message:
+
+- ``entry``: the entry or its ``meta`` is not an object
+- ``strokes``: ``strokes`` is missing or not a positive count
+- ``decomposition``: the decomposition is not a string or contains ``?``
+- ``missing_component``: a decomposition component has no entry of its own
+- ``related``: a related character is not a single character, is repeated
+  or has no entry
+- ``related_mismatch``: a related character does not list the character as
+  a direct component, the relation the app derives its related lists from
+- ``related_missing``: a character lists the entry as a direct component
+  but is missing from its ``related_characters`` (entries without the
+  field are not checked; the app derives their lists)
+- ``cycle``: characters that decompose into each other (a character listing
+  itself as its only component is an atomic component, not a cycle)
+
+Entries are checked in chunks, one chunk per task. The parent parses the
+file and builds the graph and its direct parents once; forked workers
+inherit them, and where fork is unavailable each worker loads the file
+itself. Cycles need the whole graph and are found afterwards in the
+parent. Fixable issues (``?`` decompositions, stroke counts stored as
+text, malformed, repeated or missing related characters, entries that are
+not objects) can be written out as a cleaned copy of the map::
+
+    python -m radix.validate enhanced_component_map_with_etymology.json --report report.json
+    python -m radix.validate map.json --output map.clean.json --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from radix.dataset import data_file
+from radix.decomposition import DecompositionGraph, direct_components
+from radix.index import parse_strokes
+
+CHUNK_SIZE = 2000
+
+# Set in each worker by _init_worker
+_data = None
+_graph = None
+_parents = None
+
+
+def _issue(kind, check, char, message):
+    return {"type": kind, "check": check, "char": char, "message": message}
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def _build_graph(data):
+    """The decomposition graph as the app sees it, with malformed and '?' decompositions left out."""
+    decompositions = {}
+    for char, entry in data.items():
+        if _is_entry(entry):
+            decomposition = entry.get("meta", {}).get("decomposition", "")
+            if isinstance(decomposition, str) and "?" not in decomposition:
+                decompositions[char] = {"meta": {"decomposition": decomposition}}
+    return DecompositionGraph(decompositions)
+
+
+def _direct_parents(data, graph):
+    """Character -> the single-character entries listing it as a direct component, in map order."""
+    parents = {}
+    for char in data:
+        if len(char) == 1:
+            for part in dict.fromkeys(graph.parts(char)):
+                if part != char:
+                    parents.setdefault(part, []).append(char)
+    return parents
+
+
+def _init_worker(path, data=None, graph=None, parents=None):
+    global _data, _graph, _parents
+    _data = _read(path) if data is None else data
+    _graph = _build_graph(_data) if graph is None else graph
+    _parents = _direct_parents(_data, _graph) if parents is None else parents
+
+
+def _is_entry(entry):
+    return isinstance(entry, dict) and isinstance(entry.get("meta", {}), dict)
+
+
+def check_entry(char, entry, data, graph, parents):
+    """Return ``(issues, cleaned)`` for one entry; ``cleaned`` is None when nothing needed fixing.
+
+    ``parents`` maps a character to the characters listing it as a direct component.
+    """
+    if not _is_entry(entry):
+        return [_issue("error", "entry", char, f"Entry for {char} is not an object with an object 'meta'")], None
+    issues = []
+    meta = dict(entry.get("meta", {}))
+    fixed = False
+
+    strokes = meta.get("strokes")
+    count = parse_strokes(strokes)
+    if "strokes" not in meta:
+        issues.append(_issue("warning", "strokes", char, f"No stroke count for {char}"))
+    elif count is None:
+        issues.append(_issue("warning", "strokes", char, f"Unparseable stroke count for {char}: {strokes!r}"))
+        del meta["strokes"]
+        fixed = True
+    elif strokes != count:
+        meta["strokes"] = count
+        fixed = True
+
+    decomposition = meta.get("decomposition", "")
+    if not isinstance(decomposition, str):
+        issues.append(_issue("error", "decomposition", char, f"Decomposition for {char} is not a string: {decomposition!r}"))
+        meta["decomposition"] = decomposition = ""
+        fixed = True
+    elif "?" in decomposition:
+        issues.append(_issue("warning", "decomposition", char, f"Invalid component '?' in decomposition for {char}: {decomposition}"))
+        meta["decomposition"] = decomposition = ""
+        fixed = True
+    for component in direct_components(decomposition):
+        if component not in data:
+            issues.append(_issue("warning", "missing_component", char, f"Component {component} of {char} has no entry"))
+
+    related = entry.get("related_characters", [])
+    kept = []
+    if not isinstance(related, list):
+        issues.append(_issue("warning", "related", char, f"related_characters of {char} is not a list: {related!r}"))
+        related = []
+    for other in related:
+        if not isinstance(other, str) or len(other) != 1:
+            issues.append(_issue("warning", "related", char, f"Related character of {char} is not a single character: {other!r}"))
+        elif other in kept:
+            issues.append(_issue("warning", "related", char, f"Related character {other} of {char} is listed twice"))
+        else:
+            kept.append(other)
+            if other not in data:
+                issues.append(_issue("warning", "related", char, f"Related character {other} of {char} has no entry"))
+            elif other == char or char not in graph.components(other, 1):
+                issues.append(_issue("warning", "related_mismatch", char, f"Related character {other} does not contain {char}"))
+    if "related_characters" in entry:
+        for other in parents.get(char, ()):
+            if other not in kept:
+                issues.append(_issue("warning", "related_missing", char, f"{other} contains {char} but is not among its related characters"))
+                kept.append(other)
+    if kept != entry.get("related_characters", []):
+        fixed = True
+
+    if not fixed:
+        return issues, None
+    cleaned = {**entry, "meta": meta}
+    if "related_characters" in entry:
+        cleaned["related_characters"] = kept
+    return issues, cleaned
+
+
+def _check_chunk(chars):
+    issues, cleaned = [], {}
+    for char in chars:
+        entry_issues, entry = check_entry(char, _data[char], _data, _graph, _parents)
+        issues.extend(entry_issues)
+        if entry is not None or not _is_entry(_data[char]):
+            # None drops an entry the app could not read at all
+            cleaned[char] = entry
+    return issues, cleaned
+
+
+def find_cycles(graph):
+    """Strongly connected groups of two or more characters in the decomposition graph (Tarjan, iterative)."""
+    parts_of = graph.parts
+    index, low, on_stack, stack, cycles = {}, {}, set(), [], []
+    for root in graph.entries:
+        if root in index:
+            continue
+        work = [(root, iter(parts_of(root)))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            char, parts = work[-1]
+            for part in parts:
+                if part == char:
+                    continue
+                if part not in index:
+                    index[part] = low[part] = len(index)
+                    stack.append(part)
+                    on_stack.add(part)
+                    work.append((part, iter(parts_of(part))))
+                    break
+                if part in on_stack:
+                    low[char] = min(low[char], index[part])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[char])
+                if low[char] == index[char]:
+                    group = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        group.append(member)
+                        if member == char:
+                            break
+                    if len(group) > 1:
+                        cycles.append(group[::-1])
+    return cycles
+
+
+def validate(path, workers=None, chunk_size=CHUNK_SIZE):
+    """Check every entry of ``path``; return the report and the cleaned map (None when nothing was fixed)."""
+    started = time.perf_counter()
+    data = _read(path)
+    chars = list(data)
+    chunks = [chars[i:i + chunk_size] for i in range(0, len(chars), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    graph = _build_graph(data)
+    issues, cleaned = [], {}
+    executor = None
+    # Set before the pool starts, so forked workers share the parent's copies
+    _init_worker(path, data, graph, _direct_parents(data, graph))
+    if workers == 1 or len(chunks) <= 1:
+        results = map(_check_chunk, chunks)
+    elif "fork" in multiprocessing.get_all_start_methods():
+        executor = ProcessPoolExecutor(min(workers, len(chunks)), mp_context=multiprocessing.get_context("fork"))
+        results = executor.map(_check_chunk, chunks)
+    else:
+        executor = ProcessPoolExecutor(min(workers, len(chunks)), initializer=_init_worker, initargs=(path,))
+        results = executor.map(_check_chunk, chunks)
+    try:
+        for chunk_issues, chunk_cleaned in results:
+            issues.extend(chunk_issues)
+            cleaned.update(chunk_cleaned)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for group in find_cycles(graph):
+        issues.append(_issue("error", "cycle", group[0], f"Decomposition cycle: {' → '.join(group + group[:1])}"))
+
+    report = {
+        "source": path,
+        "entries": len(data),
+        "errors": sum(i["type"] == "error" for i in issues),
+        "warnings": sum(i["type"] == "warning" for i in issues),
+        "checks": dict(Counter(i["check"] for i in issues)),
+        "fixed": len(cleaned),
+        "seconds": round(time.perf_counter() - started, 3),
+        "issues": issues,
+    }
+    if not cleaned:
+        return report, None
+    return report, {char: cleaned.get(char, entry) for char, entry in data.items() if cleaned.get(char, entry) is not None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the component map for integrity problems.")
+    parser.add_argument("source", nargs="?", help="component map JSON (default: $RADIX_DATA_FILE or the app's data file)")
+    parser.add_argument("--report", help="write the JSON report here ('-' for stdout)")
+    parser.add_argument("-o", "--output", help="write a cleaned copy of the map here")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="entries per task")
+    args = parser.parse_args(argv)
+
+    source = args.source or data_file()
+    report, cleaned = validate(source, args.workers, args.chunk_size)
+    if args.report == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.output:
+        tmp = f"{args.output}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cleaned or _read(source), f, ensure_ascii=False)
+        os.replace(tmp, args.output)
+    if args.report != "-":
+        checks = ", ".join(f"{check}: {n}" for check, n in sorted(report["checks"].items())) or "no issues"
+        print(f"{report['entries']} entries, {report['errors']} error(s), {report['warnings']} warning(s) "
+              f"({checks}); {report['fixed']} fixable, in {report['seconds']}s", file=sys.stderr)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from benchmarks.generate import write_dataset
+from radix.engine import Query
+from radix.index import NO_FILTER
+
+
+@pytest.fixture(scope="module")
+def map_path(tmp_path_factory):
+    """A generated component map, one per test module."""
+    path = tmp_path_factory.mktemp("map") / "map.json"
+    write_dataset(str(path), 2000, seed=7)
+    return str(path)
+
+
+def _random_queries(dataset, n, seed=0):
+    """Queries as sessions send them, including filters that force a corrected selection."""
+    rng = random.Random(seed)
+    index = dataset.index
+    chars = index.chars
+    for _ in range(n):
+        char = rng.choice(chars)
+        yield Query(
+            char,
+            stroke_count=rng.choice((0, 0, *index.stroke_options())),
+            radical=rng.choice((NO_FILTER, index.get_radical(char), index.get_radical(rng.choice(chars)))),
+            component_idc=rng.choice((NO_FILTER, "⿰", "⿱")),
+            display_mode=rng.choice(("Single Character", "2-Character Phrases")),
+        )
+
+
+@pytest.fixture
+def random_queries():
+    return _random_queries
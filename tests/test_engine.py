@@ -0,0 +1,26 @@
+import pytest
+
+from radix.dataset import load_dataset
+from radix.engine import QueryEngine
+
+
+@pytest.fixture(scope="module")
+def dataset(map_path):
+    return load_dataset(map_path)
+
+
+def test_cached_results_match_compute(dataset, random_queries):
+    engine = QueryEngine(dataset)
+    for query in random_queries(dataset, 400):
+        engine.run(query)
+    cached = engine.cache.items()
+    assert cached
+    for key, result in cached:
+        assert result == engine.compute(key), key
+
+
+def test_run_caches_under_the_requested_query(dataset, random_queries):
+    engine = QueryEngine(dataset)
+    corrected = next(q for q in random_queries(dataset, 400, seed=1) if engine.compute(q).query != q)
+    engine.run(corrected)
+    assert [key for key, _ in engine.cache.items()] == [corrected]
@@ -0,0 +1,45 @@
+import json
+import shutil
+
+import pytest
+
+from radix.reload import LiveDataset
+
+
+def edit_strokes(entry):
+    entry["meta"]["strokes"] += 1
+
+
+def edit_decomposition(entry):
+    decomposition = "⿰一丁"
+    entry["meta"]["decomposition"] = decomposition if entry["meta"]["decomposition"] != decomposition else "⿱一丁"
+
+
+def edit_compounds(entry):
+    entry["meta"]["compounds"] = [*entry["meta"].get("compounds", ()), "一二"]
+
+
+@pytest.mark.parametrize("edit", (edit_strokes, edit_decomposition, edit_compounds))
+@pytest.mark.parametrize("target", (5, 400, 1500))
+def test_carried_results_match_compute(map_path, tmp_path, random_queries, edit, target):
+    path = tmp_path / "map.json"
+    shutil.copy(map_path, path)
+    live = LiveDataset(str(path), interval=0)
+    dataset, engine = live.current()
+    for query in random_queries(dataset, 300):
+        engine.run(query)
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    char = list(data)[target]
+    edit(data[char])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    assert live.reload()
+    new_dataset, new_engine = live.current()
+    assert char in live.last_changes.structural
+
+    carried = new_engine.cache.items()
+    assert carried
+    for key, result in carried:
+        assert result == new_engine.compute(key), key
@@ -0,0 +1,40 @@
+import json
+
+from radix.validate import validate
+
+
+def _entry(decomposition, related):
+    return {"meta": {"decomposition": decomposition, "strokes": 4, "radical": "木"}, "related_characters": related}
+
+
+def test_omitted_related_character_is_reported_and_restored(tmp_path):
+    path = tmp_path / "map.json"
+    data = {
+        "木": _entry("", ["林"]),
+        "林": _entry("⿰木木", ["森"]),
+        "森": _entry("⿱木林", []),
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    report, cleaned = validate(str(path), workers=1)
+
+    missing = [(i["char"], i["message"]) for i in report["issues"] if i["check"] == "related_missing"]
+    assert missing == [("木", "森 contains 木 but is not among its related characters")]
+    assert cleaned["木"]["related_characters"] == ["林", "森"]
+    assert "林" not in cleaned or cleaned["林"] == data["林"]
+
+
+def test_complete_related_lists_pass_clean(tmp_path):
+    path = tmp_path / "map.json"
+    data = {
+        "木": _entry("", ["林", "森"]),
+        "林": _entry("⿰木木", ["森"]),
+        "森": _entry("⿱木林", []),
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    report, cleaned = validate(str(path), workers=1)
+
+    assert "related_missing" not in report["checks"]
+    assert "related_mismatch" not in report["checks"]
+    assert cleaned is None